@@ -2,3 +2,5 @@
 # -*- coding: utf-8 -*-
 
 __author__ = "Tanja Miličić"
+
+from DiNetX.compiled import CompiledGraph
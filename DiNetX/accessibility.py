@@ -1,24 +1,68 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import networkx as nx
+import collections
 import math
 
+import networkx as nx
+import numpy as np
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+from DiNetX import instrumentation
+from DiNetX.cache import cached
+from DiNetX.checkpoint import Checkpoint, checkpoint_key
+from DiNetX.compiled import as_compiled, _ranges, _records, _row_sums
+
+
+# Number of source nodes expanded together by one sparse product.
+_BATCH_SIZE = 512
 
-def accessibility(graph, weighted=True, h=3):
+# Number of edge and sample pairs handled by one vectorized step of
+# approximate_accessibility.
+_SAMPLE_BATCH = 1 << 22
+
+
+@cached
+def accessibility(graph, weighted=True, h=3, output='dict', out=None,
+                  nodes=None, checkpoint=None):
     """
     Accessibility provide an estimate of the number of nodes
     that can be visited in exactly h steps.
 
-    :param graph: NetworkX graph
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
     :param weighted:
         If True than probabilities p_ij will be computed
         as fraction of sum of weights of level h and
         weight of edges connecting i and j or neighbors of i and j.
     :param h: number of steps
+    :param output:
+        'dict' for the dictionary described below, or 'array' for
+        a tuple (values, nodes) with the values in a float array of
+        shape (number of nodes, h), where values[i, j-1] belongs to
+        nodes[i] and j steps.
+    :param out:
+        Path of a .npy file. If given, values are written batch by
+        batch into a memory map of that file, which is returned
+        as with output='array', so results larger than memory
+        are never held at once.
+    :param nodes:
+        Nodes to compute accessibility for, all nodes if None.
+        The work then depends only on the h-step neighborhoods
+        of these nodes, see :py:class:`AccessibilityQuery`.
+    :param checkpoint:
+        Directory where the values of finished nodes are saved
+        about once a minute. A run interrupted for any reason
+        continues from the last save when it is called again with
+        the same directory, and the values are identical to an
+        uninterrupted run. The directory is removed at the end.
     :return: Values of accessibility for each node
     :rtype: dictionary where keys are as follows - n_h_j, where
-        n represents node name, and j is current number of steps.
+        n represents node name, and j is current number of steps,
+        or tuple (array, list) for array output.
 
     .. note:: If graph is directed it will be converted to
     undirected one.
@@ -26,63 +70,45 @@ def accessibility(graph, weighted=True, h=3):
     .. seealso::
         :py:func:`in_accessibility`, :py:func:`out_accessibility`
     """
-    if graph.is_directed():
-        graph.to_undirected()
-
-    accessibility_dict = {}
-    for node in graph.nodes_iter():
-        i = 1; neighbors = {}
-        successors = graph.edges(node)
-        neighbors[i] = successors
-        _neighbors(graph, successors, neighbors, h-1, i+1)
-        for j in range(1, h+1):
-            if weighted:
-                weights = sum([int(graph.get_edge_data(u, v).get('weight'))
-                               for u, v in neighbors[j]])
-            else:
-                weights = len(neighbors[j])
-            acc = 0
-            tmp1 = [x[0] for x in neighbors[j]]
-            tmp2 = [x[1] for x in neighbors[j]]
-
-            for n in set(tmp2):
-                weight = 0; degree = 0
-                for s in set(tmp1):
-                    if weighted:
-                        if graph.has_edge(s, n):
-                            weight += float(graph.get_edge_data(s, n).get('weight'))
-                    else:
-                        if graph.has_edge(s,n):
-                            degree += 1.
-                if weighted:
-                    p_ij = weight/weights
-                else:
-                    p_ij = degree/weights
-                try:
-                    log_p_ij = math.log(p_ij)
-                    acc += -1 * (p_ij * math.log(p_ij))
-                except ValueError:
-                    continue
-
-            accessibility_dict[str(node) + '_h_' + str(j)] = math.exp(acc)
-
-    return accessibility_dict
+    graph = as_compiled(graph)
+    return _accessibility(graph, 'out', weighted, h, output, out, nodes,
+                          checkpoint)
 
 
-def in_accessibility(graph, weighted=True, h=3):
+@cached
+def in_accessibility(graph, weighted=True, h=3, output='dict', out=None,
+                     nodes=None, checkpoint=None):
     """
     In-accessibility shows the average number of nodes from which
     a given node can be reached in exactly h steps.
 
-    :param graph: NetworkX graph
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
     :param weighted:
         If True than probabilities p_ij will be computed
         as fraction of sum of in-weights of level h and
         weight of edges connecting i ad j or neighbors of i and j.
     :param h: number of steps
+    :param output:
+        'dict' for the dictionary described below, or 'array' for
+        a tuple (values, nodes) with the values in a float array of
+        shape (number of nodes, h), where values[i, j-1] belongs to
+        nodes[i] and j steps.
+    :param out:
+        Path of a .npy file. If given, values are written batch by
+        batch into a memory map of that file, which is returned
+        as with output='array', so results larger than memory
+        are never held at once.
+    :param nodes:
+        Nodes to compute accessibility for, all nodes if None.
+        The work then depends only on the h-step neighborhoods
+        of these nodes, see :py:class:`AccessibilityQuery`.
+    :param checkpoint:
+        Directory of a checkpoint to resume from and save to,
+        see :py:func:`accessibility`.
     :return: Values of in-accessibility for each node
     :rtype: dictionary where keys are as follows - n_h_j, where
-        n represents node name, and j is current number of steps.
+        n represents node name, and j is current number of steps,
+        or tuple (array, list) for array output.
 
 
     .. seealso::
@@ -93,63 +119,48 @@ def in_accessibility(graph, weighted=True, h=3):
         A useful measure for understanding social insect nest architecture."
         Chaos, Solitons & Fractals 46 (2013): 38-45.
     """
+    graph = as_compiled(graph)
     if not graph.is_directed():
         raise nx.NetworkXError(
             "in_accessibility() not defined for undirected graphs.")
 
-    accessibility_dict = {}
-    for node in graph.nodes_iter():
-        i = 1; neighbors = {}
-        successors = graph.in_edges(node)
-        neighbors[i] = successors
-        _neighbors_in(graph, successors, neighbors, h-1, i+1)
-        for j in range(1, h+1):
-            if weighted:
-                weights = sum([int(graph.get_edge_data(u, v).get('weight'))
-                               for u, v in neighbors[j]])
-            else:
-                weights = len(neighbors[j])
-            acc = 0
-            tmp1 = [x[0] for x in neighbors[j]]
-            tmp2 = [x[1] for x in neighbors[j]]
-
-            for n in set(tmp1):
-                weight = 0; degree = 0
-                for s in set(tmp2):
-                    if weighted:
-                        if graph.has_edge(n,s):
-                            weight += float(graph.get_edge_data(n,s).get('weight'))
-                    else:
-                        if graph.has_edge(n,s):
-                            degree += 1.
-                if weighted:
-                    p_ij = weight/weights
-                else:
-                    p_ij = degree/weights
-                try:
-                    log_p_ij = math.log(p_ij)
-                    acc += -1 * (p_ij * math.log(p_ij))
-                except ValueError:
-                    continue
-
-            accessibility_dict[str(node) + '_h_' + str(j)] = math.exp(acc)
-
-    return accessibility_dict
+    return _accessibility(graph, 'in', weighted, h, output, out, nodes,
+                          checkpoint)
 
 
-def out_accessibility(graph, weighted=True, h=3):
+@cached
+def out_accessibility(graph, weighted=True, h=3, output='dict', out=None,
+                      nodes=None, checkpoint=None):
     """
     Out-accessibility shows the average number of nodes that can
     be reached in exactly h steps from the given node.
-    :param graph: NetworkX graph
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
     :param weighted:
         If True than probabilities p_ij will be computed
         as fraction of sum of out-weights of level h and
         weight of edges connecting i and j or neighbors of i and j.
     :param h: number of steps
+    :param output:
+        'dict' for the dictionary described below, or 'array' for
+        a tuple (values, nodes) with the values in a float array of
+        shape (number of nodes, h), where values[i, j-1] belongs to
+        nodes[i] and j steps.
+    :param out:
+        Path of a .npy file. If given, values are written batch by
+        batch into a memory map of that file, which is returned
+        as with output='array', so results larger than memory
+        are never held at once.
+    :param nodes:
+        Nodes to compute accessibility for, all nodes if None.
+        The work then depends only on the h-step neighborhoods
+        of these nodes, see :py:class:`AccessibilityQuery`.
+    :param checkpoint:
+        Directory of a checkpoint to resume from and save to,
+        see :py:func:`accessibility`.
     :return: Values of accessibility for each node
     :rtype: dictionary where keys are as follows - n_h_j, where
-        n represents node name, and j is current number of steps.
+        n represents node name, and j is current number of steps,
+        or tuple (array, list) for array output.
 
 
     .. seealso::
@@ -160,48 +171,306 @@ def out_accessibility(graph, weighted=True, h=3):
         A useful measure for understanding social insect nest architecture."
         Chaos, Solitons & Fractals 46 (2013): 38-45.
     """
+    graph = as_compiled(graph)
+    if not graph.is_directed():
+        raise nx.NetworkXError(
+            "in_accessibility() not defined for undirected graphs.")
+
+    return _accessibility(graph, 'out', weighted, h, output, out, nodes,
+                          checkpoint)
+
+
+def iter_accessibility(graph, weighted=True, h=3, nodes=None,
+                       chunk_size=None):
+    """
+    Generate accessibility of nodes in node order.
+
+    Values are computed batch by batch while the generator is
+    consumed, so the first records are available early and memory
+    does not grow with the number of nodes.
+
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
+    :param weighted: If True probabilities are weighted as in
+        :py:func:`accessibility`
+    :param h: number of steps
+    :param nodes: Nodes to compute accessibility for, all nodes if None.
+    :param chunk_size:
+        If given, lists of chunk_size records are yielded instead
+        of single records, the last one may be shorter.
+    :type chunk_size: int or None, (default = None)
+    :return: (node, values) records, or lists of them, where
+        values[j-1] is the accessibility of node for j steps.
+    :rtype: generator
+
+    :raises ValueError: If chunk_size is not positive
+
+    .. seealso::
+        :py:func:`accessibility`
+    """
+    graph = as_compiled(graph)
+    return _iter_accessibility(graph, 'out', weighted, h, nodes, chunk_size)
+
+
+def iter_in_accessibility(graph, weighted=True, h=3, nodes=None,
+                          chunk_size=None):
+    """
+    Generate in-accessibility of nodes in node order.
+
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
+    :param weighted: If True probabilities use in-weights
+    :param h: number of steps
+    :param nodes: Nodes to compute in-accessibility for, all if None.
+    :param chunk_size: Number of records per yielded list, or None
+    :return: (node, values) records, or lists of them
+    :rtype: generator
+
+    :raises NetworkXError: If graph is undirected
+
+    .. seealso::
+        :py:func:`in_accessibility`, :py:func:`iter_accessibility`
+    """
+    graph = as_compiled(graph)
+    if not graph.is_directed():
+        raise nx.NetworkXError(
+            "in_accessibility() not defined for undirected graphs.")
+
+    return _iter_accessibility(graph, 'in', weighted, h, nodes, chunk_size)
+
+
+def iter_out_accessibility(graph, weighted=True, h=3, nodes=None,
+                           chunk_size=None):
+    """
+    Generate out-accessibility of nodes in node order.
+
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
+    :param weighted: If True probabilities use out-weights
+    :param h: number of steps
+    :param nodes: Nodes to compute out-accessibility for, all if None.
+    :param chunk_size: Number of records per yielded list, or None
+    :return: (node, values) records, or lists of them
+    :rtype: generator
+
+    :raises NetworkXError: If graph is undirected
+
+    .. seealso::
+        :py:func:`out_accessibility`, :py:func:`iter_accessibility`
+    """
+    graph = as_compiled(graph)
     if not graph.is_directed():
+        raise nx.NetworkXError(
+            "out_accessibility() not defined for undirected graphs.")
+
+    return _iter_accessibility(graph, 'out', weighted, h, nodes, chunk_size)
+
+
+@cached
+def approximate_accessibility(graph, weighted=True, h=3, samples=1000,
+                              seed=None, direction='out', nodes=None,
+                              output='dict'):
+    """
+    Accessibility estimated from random samples of every level.
+
+    Level j of node i, as in :py:func:`accessibility`, is made of the
+    edges leaving the nodes reached from i in exactly j - 1 steps,
+    and p_ij is the share of their weight that ends at node j. Each
+    sample draws one of these nodes with probability proportional
+    to its strength, using exponential ranks whose minima are
+    propagated over the successors, and p_ij is estimated as the
+    mean over the sampled nodes of the shares of their weight
+    ending at j. The value is exp(H), with H the entropy of this
+    estimate after a second order bias correction, and it converges
+    to the value of :py:func:`accessibility` as samples grows. The
+    standard errors measure the sampling noise by the delta method.
+
+    The estimate is accurate once the edges of the sampled nodes
+    cover most of the level, and it is too low while samples times
+    the average degree is well below the number of nodes a level
+    reaches. The standard errors do not include that bias.
+
+    Each step costs a pass over the edges per sample and memory
+    holds two values per node and sample, independently of the
+    size of the levels, so large h stays feasible on dense graphs
+    where the exact levels cover most of the graph.
+
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
+    :param weighted:
+        If True probabilities are weighted as in
+        :py:func:`accessibility`, weights must not be negative
+    :param h: number of steps
+    :param samples: Number of sampled edges per node and level
+    :type samples: int, (default = 1000)
+    :param seed: Seed of the random number generator
+    :type seed: int or None, (default = None)
+    :param direction:
+        'out' follows outgoing edges as :py:func:`accessibility`
+        does, 'in' incoming ones as :py:func:`in_accessibility`.
+    :type direction: string, (default = 'out')
+    :param nodes: Nodes to compute accessibility for, all if None
+    :param output: 'dict' or 'array', as in :py:func:`accessibility`
+    :return:
+        Estimates and their standard errors, as two dictionaries
+        keyed as n_h_j like the result of :py:func:`accessibility`,
+        or for array output as a tuple (values, errors, nodes).
+    :rtype: tuple
+
+    :raises NetworkXError: If direction is 'in' and graph is undirected
+    :raises ValueError: If samples is not positive
+
+    References:
+        ..[1] Cohen, E. "Size-estimation framework with applications
+        to transitive closure and reachability." Journal of Computer
+        and System Sciences 55.3 (1997): 441-453.
+    """
+    if samples < 1:
+        raise ValueError("Number of samples must be positive")
+    if output not in ('dict', 'array'):
+        raise ValueError("Unknown output %r" % output)
+    if direction not in ('out', 'in'):
+        raise ValueError("Unknown direction %r" % direction)
+    graph = as_compiled(graph)
+    if direction == 'in' and not graph.is_directed():
         raise nx.NetworkXError(
             "in_accessibility() not defined for undirected graphs.")
 
+    indptr, indices, weights = _adjacency(graph, direction)
+    if nodes is None:
+        nodes = graph.nodes
+        sources = np.arange(graph.order())
+    else:
+        nodes = list(nodes)
+        sources = np.array([graph.index[node] for node in nodes],
+                           dtype=np.int64)
+
+    random_state = np.random.RandomState(seed)
+    values = np.empty((len(nodes), h))
+    errors = np.empty((len(nodes), h))
+    with instrumentation.phase('accessibility'):
+        for j, (entropy, error) in enumerate(_sampled_levels(
+                indptr, indices, weights, weighted, h, samples, sources,
+                random_state)):
+            values[:, j] = np.exp(entropy)
+            # Delta method, the standard error of exp(H) is exp(H) sd(H).
+            errors[:, j] = values[:, j] * error
+
+    if output == 'array':
+        return values, errors, nodes
+
     accessibility_dict = {}
-    for node in graph.nodes_iter():
-        i = 1; neighbors = {}
-        successors = graph.out_edges(node)
-        neighbors[i] = successors
-        _neighbors_out(graph, successors, neighbors, h-1, i+1)
+    error_dict = {}
+    for node, row, error_row in zip(nodes, values.tolist(), errors.tolist()):
         for j in range(1, h+1):
-            if weighted:
-                weights = sum([int(graph.get_edge_data(u, v).get('weight'))
-                               for u, v in neighbors[j]])
+            key = str(node) + '_h_' + str(j)
+            accessibility_dict[key] = row[j - 1]
+            error_dict[key] = error_row[j - 1]
+
+    return accessibility_dict, error_dict
+
+
+class AccessibilityQuery(object):
+    """
+    Accessibility of selected nodes, reusing neighborhood expansions.
+
+    The nodes reached from i in exactly j steps are the union of the
+    nodes reached in j - 1 steps from the successors of i, so these
+    sets are built recursively and kept in a bounded LRU cache keyed
+    by node and number of steps. Seeds close to each other share
+    most of their expansions, and the cost of a query depends only
+    on the h-step neighborhoods of the queried nodes.
+
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
+    :param direction:
+        'out' follows outgoing edges as :py:func:`out_accessibility`
+        and :py:func:`accessibility` do, 'in' follows incoming edges
+        as :py:func:`in_accessibility` does.
+    :type direction: string, (default = 'out')
+    :param weighted: If True probabilities are weighted as in
+        :py:func:`accessibility`
+    :type weighted: boolean, (default = True)
+    :param cache_size: Largest number of cached neighborhoods
+    :type cache_size: int, (default = 65536)
+
+    :raises NetworkXError: If direction is 'in' and graph is undirected
+    """
+
+    def __init__(self, graph, direction='out', weighted=True,
+                 cache_size=65536):
+        if direction not in ('out', 'in'):
+            raise ValueError("Unknown direction %r" % direction)
+        self.graph = as_compiled(graph)
+        if direction == 'in' and not self.graph.is_directed():
+            raise nx.NetworkXError(
+                "in_accessibility() not defined for undirected graphs.")
+
+        self.weighted = weighted
+        self.cache_size = cache_size
+        self._indptr, self._indices, self._weights = _adjacency(
+            self.graph, direction)
+        self._cache = collections.OrderedDict()
+
+    def query(self, nodes, h=3, output='dict'):
+        """
+        Accessibility of nodes for 1 to h steps.
+
+        :param nodes: Iterable of nodes
+        :param h: number of steps
+        :param output: 'dict' or 'array', as in :py:func:`accessibility`
+        :return: Values of accessibility for each of the nodes
+        """
+        if output not in ('dict', 'array'):
+            raise ValueError("Unknown output %r" % output)
+
+        nodes = list(nodes)
+        with instrumentation.phase('accessibility'):
+            values = self._values([self.graph.index[node] for node in nodes],
+                                  h, np.empty((len(nodes), h)))
+        if output == 'array':
+            return values, nodes
+
+        accessibility_dict = {}
+        for node, row in zip(nodes, values.tolist()):
+            for j in range(1, h+1):
+                accessibility_dict[str(node) + '_h_' + str(j)] = row[j - 1]
+
+        return accessibility_dict
+
+    def _values(self, sources, h, values):
+        indptr, indices, weights = self._indptr, self._indices, self._weights
+        profile = instrumentation.active()
+        for row, i in enumerate(sources):
+            for j in range(h):
+                reached = self._reached(i, j)
+                edges = _ranges(indptr[reached], indptr[reached + 1])
+                if profile is not None:
+                    profile.add_level('frontier_nodes', j + 1, len(reached))
+                    profile.count('nodes_visited', len(reached))
+                    profile.count('edges_relaxed', len(edges))
+                values[row, j] = math.exp(
+                    _entropy(indices[edges], weights[edges], self.weighted))
+
+        return values
+
+    def _reached(self, i, j):
+        # Sorted indices of the nodes reached from i in exactly j steps.
+        if j == 0:
+            return np.array([i])
+
+        key = (i, j)
+        reached = self._cache.pop(key, None)
+        if reached is None:
+            if j == 1:
+                reached = np.unique(
+                    self._indices[self._indptr[i]:self._indptr[i + 1]])
             else:
-                weights = len(neighbors[j])
-            acc = 0
-            tmp1 = [x[0] for x in neighbors[j]]
-            tmp2 = [x[1] for x in neighbors[j]]
-
-            for n in set(tmp2):
-                weight = 0; degree = 0
-                for s in set(tmp1):
-                    if weighted:
-                        if graph.has_edge(s,n):
-                            weight += float(graph.get_edge_data(s,n).get('weight'))
-                    else:
-                        if graph.has_edge(s,n):
-                            degree += 1.
-                if weighted:
-                    p_ij = weight/weights
-                else:
-                    p_ij = degree/weights
-                try:
-                    log_p_ij = math.log(p_ij)
-                    acc += -1 * (p_ij * math.log(p_ij))
-                except ValueError:
-                    continue
-
-            accessibility_dict[str(node) + '_h_' + str(j)] = math.exp(acc)
+                successors = self._reached(i, 1)
+                reached = np.unique(np.concatenate(
+                    [self._reached(s, j - 1) for s in successors.tolist()]
+                    or [successors]))
 
-    return accessibility_dict
+        self._cache[key] = reached
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+        return reached
 
 
 ###############################################################################
@@ -209,43 +478,315 @@ def out_accessibility(graph, weighted=True, h=3):
 ###############################################################################
 
 
-def _neighbors(graph, neighbors, neighbour_dict, num_levels, i):
-    if num_levels == 0:
-        return neighbour_dict
+def _accessibility(graph, direction, weighted, h, output, out, nodes,
+                   checkpoint=None):
+    if output not in ('dict', 'array'):
+        raise ValueError("Unknown output %r" % output)
+
+    if nodes is None:
+        nodes = graph.nodes
+        sources = None
+    else:
+        nodes = list(nodes)
+        sources = [graph.index[node] for node in nodes]
+
+    if out is not None:
+        values = np.lib.format.open_memmap(out, mode='w+', dtype=np.float64,
+                                           shape=(len(nodes), h))
+    else:
+        values = np.empty((len(nodes), h))
+
+    state = None
+    first = 0
+    if checkpoint is not None:
+        state = Checkpoint(checkpoint, checkpoint_key(
+            'DiNetX.accessibility._accessibility', graph, direction=direction,
+            weighted=weighted, h=h, sources=sources), (len(nodes), h))
+        first = state.done
+        values[:first] = state.values[:first]
+
+    with instrumentation.phase('accessibility'):
+        for start, block in _accessibility_blocks(graph, direction, weighted,
+                                                  h, sources, first):
+            values[start:start + len(block)] = block
+            if state is not None:
+                state.values[start:start + len(block)] = block
+                state.advance(start + len(block))
+
+    if state is not None:
+        state.remove()
+
+    if out is not None:
+        values.flush()
+    if output == 'array' or out is not None:
+        return values, nodes
+
+    accessibility_dict = {}
+    for node, row in zip(nodes, values.tolist()):
+        for j in range(1, h+1):
+            accessibility_dict[str(node) + '_h_' + str(j)] = row[j - 1]
+
+    return accessibility_dict
+
+
+def _iter_accessibility(graph, direction, weighted, h, nodes, chunk_size):
+    if nodes is None:
+        nodes = graph.nodes
+        sources = None
+    else:
+        nodes = list(nodes)
+        sources = [graph.index[node] for node in nodes]
+
+    return _records(nodes, _timed_blocks(_accessibility_blocks(
+        graph, direction, weighted, h, sources)), chunk_size)
+
+
+def _accessibility_blocks(graph, direction, weighted, h, sources=None,
+                          first=0):
+    # Yield (start, values) for consecutive batches of sources, all
+    # nodes if None, where values[r, j-1] belongs to sources[start + r].
+    # The first sources are skipped.
+    if sources is None and sparse is not None:
+        indptr, indices, weights = _adjacency(graph, direction)
+        for block in _sparse_blocks(graph.order(), indptr, indices, weights,
+                                    weighted, h, first=first):
+            yield block
+        return
+
+    query = AccessibilityQuery(graph, direction, weighted)
+    if sources is None:
+        sources = range(graph.order())
+    for start in range(first, len(sources), _BATCH_SIZE):
+        batch = sources[start:start + _BATCH_SIZE]
+        yield start, query._values(batch, h, np.empty((len(batch), h)))
+
+
+def _sparse_blocks(n, indptr, indices, weights, weighted, h,
+                   batch_size=_BATCH_SIZE, first=0):
+    # Yield (start, values) for batches of batch_size nodes from first
+    # on, where row r of values holds accessibility of node start + r
+    # for j = 1..h.
+    #
+    # Level j of node i consists of all edges leaving the nodes reached
+    # at level j - 1, starting from i itself. With X the 0/1 matrix of
+    # those nodes for a batch of sources, X A gives the nodes reached
+    # at level j, X W the weight arriving at every node and X t the
+    # total weight of the level, so p_ij is (X W)_ij / (X t)_i.
+    adjacency = sparse.csr_matrix(
+        (np.ones(len(indices)), indices, indptr), shape=(n, n))
+    if weighted:
+        level_weights = sparse.csr_matrix(
+            (weights.astype(np.float64), indices, indptr), shape=(n, n))
+        totals = _row_sums(indptr, weights if weights.dtype.kind == 'i'
+                           else np.trunc(weights))
+    else:
+        level_weights = adjacency
+        totals = np.diff(indptr)
+    totals = totals.astype(np.float64)
+    profile = instrumentation.active()
+
+    for start in range(first, n, batch_size):
+        sources = np.arange(start, min(n, start + batch_size))
+        values = np.empty((len(sources), h))
+        frontier = sparse.csr_matrix(
+            (np.ones(len(sources)), (np.arange(len(sources)), sources)),
+            shape=(len(sources), n))
+        for j in range(h):
+            if j > 0:
+                frontier = frontier.dot(adjacency)
+                frontier.data[:] = 1.
+            level = frontier.dot(level_weights)
+            values[:, j] = np.exp(_row_entropy(level, frontier.dot(totals)))
+            if profile is not None:
+                profile.add_level('frontier_nodes', j + 1, frontier.nnz)
+                profile.count('nodes_visited', frontier.nnz)
+                profile.count('edges_relaxed', int(
+                    frontier.dot(np.diff(indptr)).sum()))
+        yield start, values
+
+
+def _timed_blocks(blocks):
+    # Convert blocks of values to lists, timing the computation of every
+    # block but not the consumer.
+    blocks = iter(blocks)
+    while True:
+        with instrumentation.phase('accessibility'):
+            block = next(blocks, None)
+            if block is None:
+                return
+            start, values = block
+            values = values.tolist()
+        yield start, values
+
+
+def _adjacency(graph, direction):
+    if direction == 'in':
+        return graph.in_indptr, graph.in_indices, graph.in_weights
+    return graph.out_indptr, graph.out_indices, graph.out_weights
+
+
+def _row_entropy(level, totals):
+    # -sum p log p over the stored entries of every row of level.
+    rows = np.repeat(np.arange(level.shape[0]), np.diff(level.indptr))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p_ij = level.data / totals[rows]
+    keep = p_ij > 0
+    entropy = np.bincount(rows[keep], weights=-p_ij[keep] * np.log(p_ij[keep]),
+                          minlength=level.shape[0])
+    entropy[totals == 0] = 0.
+    return entropy
+
+
+def _entropy(targets, weights, weighted):
+    if weighted:
+        total = weights.sum() if weights.dtype.kind == 'i' \
+            else np.trunc(weights).sum()
     else:
-        tmp = []
-        for n, s in neighbors:
-            succ = graph.edges(s)
-            if len(succ) > 0:
-                tmp.append(succ)
-        tmp = [val for sublist in tmp for val in sublist]
-        neighbour_dict[i] = list(set(tmp))
-        _neighbors(graph, tmp, neighbour_dict, num_levels-1, i+1)
-
-
-def _neighbors_out(graph, neighbors, neighbour_dict, num_levels, i):
-    if num_levels == 0:
-        return neighbour_dict
+        total = len(targets)
+    # Bin over the distinct targets only, so the cost does not grow
+    # with the number of nodes in the graph.
+    targets = np.unique(targets, return_inverse=True)[1]
+    if weighted:
+        mass = np.bincount(targets, weights=weights)
     else:
-        tmp = []
-        for n, s in neighbors:
-            succ = graph.out_edges(s)
-            if len(succ) > 0:
-                tmp.append(succ)
-        tmp = [val for sublist in tmp for val in sublist]
-        neighbour_dict[i] = set(tmp)
-        _neighbors_out(graph, tmp, neighbour_dict, num_levels-1, i+1)
-
-
-def _neighbors_in(graph, neighbors, neighbour_dict, num_levels, i):
-    if num_levels == 0:
-        return neighbour_dict
+        mass = np.bincount(targets).astype(np.float64)
+
+    if total == 0:
+        return 0.
+
+    p_ij = mass[mass > 0] / total
+    return float(-1 * (p_ij * np.log(p_ij)).sum())
+
+
+def _sampled_levels(indptr, indices, weights, weighted, h, samples,
+                    sources, random_state):
+    # Yield the estimated entropy of levels 1..h of the sources and its
+    # standard error.
+    #
+    # Every node u gets, for each sample, a rank E/s_u with E standard
+    # exponential and s_u the strength of u. The node of smallest rank
+    # in a set is drawn with probability proportional to strength, and
+    # the smallest rank over the nodes reached in exactly j steps is
+    # the smallest over the successors of the same for j - 1 steps.
+    n = len(indptr) - 1
+    if weighted:
+        weights = np.maximum(weights, 0).astype(np.float64)
+        strengths = _row_sums(indptr, weights)
+        # Totals of accessibility truncate fractional weights, so p_ij
+        # are the sampled shares scaled by the ratio of both sums.
+        ratios = None
+        if not np.array_equal(weights, np.trunc(weights)):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratios = _row_sums(indptr, np.trunc(weights)) / strengths
     else:
-        tmp = []
-        for n, p in neighbors:
-            pred = graph.in_edges(n)
-            if len(pred) > 0:
-                tmp.append(pred)
-        tmp = [val for sublist in tmp for val in sublist]
-        neighbour_dict[i] = set(tmp)
-        _neighbors_in(graph, tmp, neighbour_dict, num_levels-1, i+1)
+        strengths = np.diff(indptr).astype(np.float64)
+        weights = np.ones(len(indices))
+        ratios = None
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = weights / np.repeat(strengths, np.diff(indptr))
+
+    with np.errstate(divide='ignore'):
+        ranks = random_state.standard_exponential((n, samples)) / \
+            strengths[:, None]
+    owners = np.repeat(np.arange(n), samples).reshape(n, samples)
+    degree = max(1., len(indices) / float(max(1, n)))
+    rows_per_batch = max(1, int(_SAMPLE_BATCH // (samples * degree)))
+    profile = instrumentation.active()
+
+    for j in range(h):
+        entropy = np.zeros(len(sources))
+        variance = np.zeros(len(sources))
+        for start in range(0, len(sources), rows_per_batch):
+            batch = sources[start:start + rows_per_batch]
+            alive = np.isfinite(ranks[batch])
+            block = slice(start, start + len(batch))
+            entropy[block], variance[block], relaxed = _mixture_entropy(
+                indptr, indices, shares, owners[batch], alive, samples)
+            if ratios is not None:
+                scale = np.where(alive, ratios[owners[batch]], 0.).sum(
+                    axis=1) / samples
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    entropy[block] = np.where(
+                        scale > 0, (entropy[block] + np.log(scale)) / scale,
+                        0.)
+                    variance[block] = np.where(
+                        scale > 0, variance[block] / scale ** 2, 0.)
+            if profile is not None:
+                profile.count('edges_relaxed', relaxed)
+        yield entropy, np.sqrt(variance)
+
+        if j + 1 < h:
+            ranks, owners = _min_over_successors(indptr, indices, ranks,
+                                                 owners)
+            if profile is not None:
+                profile.count('edges_relaxed', len(indices) * samples)
+
+
+def _min_over_successors(indptr, indices, ranks, owners):
+    # Smallest rank over the successors of every node and its owner,
+    # an infinite rank for nodes without successors.
+    n, samples = ranks.shape
+    rows = np.flatnonzero(np.diff(indptr) > 0)
+    lengths = np.diff(indptr)[rows]
+    new_ranks = np.full(ranks.shape, np.inf)
+    new_owners = np.zeros(owners.shape, dtype=owners.dtype)
+    if len(indices) == 0:
+        return new_ranks, new_owners
+
+    edge_rows = np.repeat(rows, lengths)
+    width = max(1, _SAMPLE_BATCH // len(indices))
+    for start in range(0, samples, width):
+        block = slice(start, start + width)
+        candidates = ranks[indices, block]
+        smallest = np.minimum.reduceat(candidates, indptr[rows], axis=0)
+        new_ranks[rows, block] = smallest
+        edge, sample = np.nonzero(candidates ==
+                                  np.repeat(smallest, lengths, axis=0))
+        new_owners[edge_rows[edge], start + sample] = \
+            owners[indices[edge], start + sample]
+    return new_ranks, new_owners
+
+
+def _mixture_entropy(indptr, indices, shares, owners, alive, samples):
+    # Entropy of p_ij estimated, for every row of owners, as the mean
+    # over the sampled nodes u of the shares of the weight of u ending
+    # at j, with the delta method variance. Rows have all samples
+    # alive or none. The bias of the plug-in entropy is corrected by
+    # (sum_j E[q_uj^2] / p_ij - 1) / 2k for k samples, which is the
+    # Miller-Madow correction when every q_u has a single target.
+    rows = len(owners)
+    pair_rows, pair_owners = np.nonzero(alive)
+    pair_owners = owners[pair_rows, pair_owners]
+    pairs, counts = np.unique(pair_rows * (len(indptr) - 1) + pair_owners,
+                              return_counts=True)
+    pair_rows, pair_owners = np.divmod(pairs, len(indptr) - 1)
+    counts = counts / float(samples)
+
+    starts, stops = indptr[pair_owners], indptr[pair_owners + 1]
+    edges = _ranges(starts, stops)
+    edge_pairs = np.repeat(np.arange(len(pairs)), stops - starts)
+    q = shares[edges]
+    keep = q > 0
+    edges, edge_pairs, q = edges[keep], edge_pairs[keep], q[keep]
+    edge_rows = pair_rows[edge_pairs]
+
+    keys, inverse = np.unique(edge_rows * (len(indptr) - 1) + indices[edges],
+                              return_inverse=True)
+    inverse = inverse.reshape(-1)
+    key_rows = keys // (len(indptr) - 1)
+    p = np.bincount(inverse, weights=counts[edge_pairs] * q)
+    second = np.bincount(inverse, weights=counts[edge_pairs] * q ** 2)
+    log_p = np.log(p)
+
+    entropy = np.bincount(key_rows, weights=-p * log_p, minlength=rows)
+    # Cross entropy of every sampled node with the estimate, whose mean
+    # is the entropy.
+    cross = np.bincount(edge_pairs, weights=-q * log_p[inverse],
+                        minlength=len(pairs))
+    spread = np.bincount(pair_rows, weights=counts * cross ** 2,
+                         minlength=rows) - entropy ** 2
+    bias = np.bincount(key_rows, weights=second / p, minlength=rows) - 1
+    variance = np.maximum(spread, 0) / samples
+    entropy = np.where(alive.any(axis=1),
+                       entropy + np.maximum(bias, 0) / (2. * samples), 0.)
+    return entropy, variance, len(edges)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import collections
+import copy
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+
+import numpy as np
+
+from DiNetX.compiled import CompiledGraph, as_compiled
+
+
+# Bump when a metric changes its results, to invalidate stored entries.
+_CACHE_VERSION = 1
+
+# Arguments that do not change the result of a metric.
+_IGNORED_ARGUMENTS = ('n_jobs', 'engine', 'checkpoint')
+
+# Arguments whose use bypasses the cache, because the call writes to
+# or reads from a file.
+_UNCACHED_ARGUMENTS = ('out', 'distances')
+
+_cache = None
+
+
+class ResultCache(object):
+    """
+    LRU store of metric results keyed by graph fingerprint and arguments.
+
+    :param maxsize: Largest number of results kept in memory
+    :type maxsize: int, (default = 128)
+    :param maxbytes:
+        Largest total pickled size of the results kept in memory,
+        unbounded if None
+    :type maxbytes: int or None, (default = None)
+    :param path:
+        Directory where results are also stored as pickle files and
+        looked up on a miss, so they survive the process. No disk
+        store is used if None.
+    :type path: string or None, (default = None)
+    """
+
+    def __init__(self, maxsize=128, maxbytes=None, path=None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        if path is not None and not os.path.isdir(path):
+            os.makedirs(path)
+
+    def get(self, key):
+        """Return the result stored under key, or None."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+        if self.path is not None:
+            try:
+                with open(self._file(key), 'rb') as f:
+                    value = pickle.load(f)
+            except (IOError, OSError):
+                pass
+            else:
+                self.hits += 1
+                self._remember(key, value)
+                return value
+
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """Store value under key, evicting least recently used results."""
+        self._remember(key, value)
+        if self.path is not None:
+            handle, name = tempfile.mkstemp(dir=self.path)
+            with os.fdopen(handle, 'wb') as f:
+                pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(name, self._file(key))
+
+    def clear(self):
+        """Drop all results held in memory."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remember(self, key, value):
+        size = len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)) \
+            if self.maxbytes is not None else 0
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size)
+        self._bytes += size
+        while len(self._entries) > self.maxsize or (
+                self.maxbytes is not None and self._bytes > self.maxbytes
+                and len(self._entries) > 1):
+            self._bytes -= self._entries.popitem(last=False)[1][1]
+
+    def _file(self, key):
+        return os.path.join(self.path, key + '.pkl')
+
+
+def enable(maxsize=128, maxbytes=None, path=None):
+    """
+    Turn on caching of metric results.
+
+    Every public metric then returns a copy of a stored result when
+    it is called again on a graph with the same fingerprint and with
+    the same arguments. Results of runs with seed=None and of runs
+    using a file through out= or distances= are not cached. NetworkX graphs
+    are compiled on every call to compute their fingerprint, so
+    passing a CompiledGraph makes hits much cheaper.
+
+    :param maxsize: Largest number of results kept in memory
+    :param maxbytes: Largest total pickled size kept in memory
+    :param path: Directory of the optional on-disk store
+    :return: The active cache
+    :rtype: ResultCache
+    """
+    global _cache
+    _cache = ResultCache(maxsize, maxbytes, path)
+    return _cache
+
+
+def disable():
+    """Turn off caching and drop the results held in memory."""
+    global _cache
+    _cache = None
+
+
+def active():
+    """The active ResultCache, or None when caching is off."""
+    return _cache
+
+
+def fingerprint(graph):
+    """
+    Hash of the structure, weights and node labels of graph.
+
+    CompiledGraphs remember their fingerprint, so it is computed
+    once per compiled graph.
+
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
+    :return: Hexadecimal digest
+    :rtype: string
+    """
+    graph = as_compiled(graph)
+    digest = getattr(graph, '_fingerprint', None)
+    if digest is None:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr((graph.is_directed(), graph.order(),
+                       graph.out_weights.dtype.str)).encode())
+        h.update(repr(list(graph.nodes)).encode())
+        for array in (graph.out_indptr, graph.out_indices,
+                      graph.out_weights):
+            h.update(np.ascontiguousarray(array).data)
+        digest = graph._fingerprint = h.hexdigest()
+    return digest
+
+
+def cached(function):
+    """
+    Decorate a metric whose first argument is the graph so that its
+    results are looked up in the active cache.
+
+    With caching off the decorated function is called directly.
+    """
+    signature = inspect.signature(function)
+    name = '%s.%s' % (function.__module__, function.__name__)
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if _cache is None:
+            return function(*args, **kwargs)
+
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = bound.arguments
+        if any(arguments.get(argument) is not None
+               for argument in _UNCACHED_ARGUMENTS) or \
+                ('seed' in arguments and arguments['seed'] is None):
+            return function(*args, **kwargs)
+
+        if arguments.get('nodes') is not None:
+            arguments['nodes'] = list(arguments['nodes'])
+
+        # Convert once here, the metric then receives the compiled graph.
+        graph = arguments['graph']
+        if arguments.get('to_undirected') is True:
+            graph = as_compiled(graph, True)
+            arguments['to_undirected'] = False
+        elif not isinstance(graph, CompiledGraph):
+            graph = as_compiled(graph)
+        arguments['graph'] = graph
+
+        key = _key(name, graph, arguments)
+        result = _cache.get(key)
+        if result is None:
+            result = function(*bound.args, **bound.kwargs)
+            _cache.put(key, result)
+        return copy.deepcopy(result)
+
+    return wrapper
+
+
+def _key(name, graph, arguments):
+    parameters = []
+    for argument, value in sorted(arguments.items()):
+        if argument == 'graph' or argument in _IGNORED_ARGUMENTS:
+            continue
+        if isinstance(value, np.ndarray):
+            value = value.tolist()
+        elif isinstance(value, (range, tuple)):
+            value = list(value)
+        parameters.append((argument, value))
+
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((_CACHE_VERSION, name, fingerprint(graph),
+                   parameters)).encode())
+    return h.hexdigest()
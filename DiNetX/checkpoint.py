@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from DiNetX.cache import _key
+from DiNetX.parallel import imap_sources
+
+
+# Bump when the layout of a checkpoint changes.
+_CHECKPOINT_VERSION = 1
+
+# Smallest number of seconds between two saves of a checkpoint.
+_INTERVAL = 60.
+
+# Sources per range of a checkpointed per-source loop.
+_BLOCK_SOURCES = 1024
+
+_VALUES = 'values.npy'
+_META = 'meta.json'
+
+
+class Checkpoint(object):
+    """
+    Results of a per-source loop kept in a directory, so that an
+    interrupted run continues where it stopped.
+
+    Sources are completed in index order and the checkpoint holds
+    the results of the first done sources in a memory-mapped
+    ``.npy`` file with one row per source. Every save flushes the
+    rows and then atomically replaces a small metadata file with the
+    new done count, so a run killed at any moment leaves the last
+    saved state readable. Saves happen at most once per interval
+    seconds, which keeps their cost negligible.
+
+    :param path: Directory of the checkpoint, created if missing
+    :param key: Identifies the computation, see :py:func:`checkpoint_key`
+    :param shape: Shape of the results, one row per source
+    :param interval: Smallest number of seconds between two saves
+    :type interval: float, (default = 60)
+
+    :ivar done: Number of leading sources whose rows are final
+    :ivar values: Memory map of the results
+
+    :raises ValueError:
+        If the directory holds a checkpoint of another computation
+    """
+
+    def __init__(self, path, key, shape, interval=_INTERVAL):
+        self.path = path
+        self.key = key
+        self.interval = interval
+        self.done = 0
+
+        meta = os.path.join(path, _META)
+        values = os.path.join(path, _VALUES)
+        if os.path.exists(meta):
+            with open(meta) as f:
+                meta = json.load(f)
+            if meta.get('version') != _CHECKPOINT_VERSION:
+                raise ValueError("Unsupported checkpoint version %r"
+                                 % meta.get('version'))
+            if meta['key'] != key:
+                raise ValueError("Checkpoint %s belongs to another computation"
+                                 % path)
+            self.done = meta['done']
+            self.values = np.load(values, mmap_mode='r+')
+        else:
+            if not os.path.isdir(path):
+                os.makedirs(path)
+            self.values = np.lib.format.open_memmap(
+                values, mode='w+', dtype=np.float64, shape=shape)
+
+        self._saved = time.perf_counter()
+
+    def advance(self, done):
+        """
+        Mark the first done sources as final and save if the last
+        save is at least interval seconds old.
+        """
+        self.done = done
+        if time.perf_counter() - self._saved >= self.interval:
+            self.save()
+
+    def save(self):
+        """Write the rows and the done count to the directory."""
+        self.values.flush()
+        handle, name = tempfile.mkstemp(dir=self.path)
+        with os.fdopen(handle, 'w') as f:
+            json.dump({'version': _CHECKPOINT_VERSION, 'key': self.key,
+                       'done': self.done}, f)
+        os.replace(name, os.path.join(self.path, _META))
+        self._saved = time.perf_counter()
+
+    def remove(self):
+        """Delete the checkpoint files, after the run has finished."""
+        del self.values
+        for name in (_META, _VALUES):
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass
+        try:
+            os.rmdir(self.path)
+        except OSError:
+            pass
+
+
+def checkpoint_key(name, graph, **parameters):
+    """
+    Key of the computation name with parameters on graph, which
+    must be a CompiledGraph.
+    """
+    return _key(name, graph, parameters)
+
+
+def checkpointed_map(func, graph, n_sources, n_jobs, args, path, key,
+                     block_size=_BLOCK_SOURCES):
+    """
+    Evaluate func over all sources like
+    :py:func:`DiNetX.parallel.map_sources`, resuming from and saving
+    to the checkpoint at path. func must return one float per source.
+
+    The checkpoint is removed once all sources are done.
+
+    :return: One result per source
+    :rtype: list
+    """
+    state = Checkpoint(path, key, (n_sources,))
+    for start, stop, part in imap_sources(func, graph, state.done, n_sources,
+                                          n_jobs, args, block_size):
+        state.values[start:stop] = part
+        state.advance(stop)
+
+    results = state.values.tolist()
+    state.remove()
+    return results
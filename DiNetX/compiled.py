@@ -0,0 +1,533 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import networkx as nx
+import numpy as np
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+from DiNetX import instrumentation
+
+
+class CompiledGraph(object):
+    """
+    Array representation of a graph used by all DiNetX metrics.
+
+    Nodes are mapped to integer indices 0..n-1 and both adjacencies
+    are stored in compressed sparse row (CSR) form. Row ``i`` of the
+    out-adjacency holds the successors of node ``i`` in
+    ``out_indices[out_indptr[i]:out_indptr[i + 1]]`` and the weights
+    of those edges at the same positions in ``out_weights``. The
+    in-adjacency stores predecessors the same way and is built on
+    first use. For undirected graphs every edge is stored in both
+    rows and the in-adjacency is the out-adjacency.
+
+    Converting a NetworkX graph costs one pass over its edges, so a
+    graph that is analysed with several metrics should be compiled
+    once and the CompiledGraph passed to every metric. SciPy sparse
+    matrices and edge arrays are wrapped without going through
+    NetworkX, see :py:meth:`from_scipy` and :py:meth:`from_edges`.
+
+    :param nodes: Node labels, position i is the label of index i
+    :param out_indptr: Row pointer of the out-adjacency
+    :param out_indices: Column indices of the out-adjacency
+    :param out_weights: Edge weights of the out-adjacency
+    :param directed: Whether the graph is directed
+    :type directed: boolean, (default = True)
+
+    .. seealso::
+        :py:meth:`from_networkx`, :py:meth:`from_scipy`,
+        :py:meth:`from_edges`
+    """
+
+    def __init__(self, nodes, out_indptr, out_indices, out_weights,
+                 directed=True):
+        self.nodes = list(nodes)
+        self.out_indptr = np.asarray(out_indptr, dtype=np.int64)
+        self.out_indices = np.asarray(out_indices,
+                                      dtype=_index_dtype(len(self.nodes)))
+        self.out_weights = _weight_array(out_weights)
+        self.directed = directed
+
+        if len(self.out_indptr) != len(self.nodes) + 1:
+            raise ValueError(
+                "out_indptr must have one entry per node plus one")
+
+        if directed:
+            self._in = None
+        else:
+            self._in = (self.out_indptr, self.out_indices, self.out_weights)
+
+        self._index = None
+
+    @classmethod
+    def from_networkx(cls, graph, weight='weight', default=1):
+        """
+        Compile a NetworkX graph.
+
+        :param graph: NetworkX graph
+        :param weight: Name of the edge attribute holding the weight
+        :param default: Weight used for edges without the attribute
+        :return: Compiled graph
+        :rtype: CompiledGraph
+
+        :raises NetworkXError: If graph is a multigraph
+        """
+        if graph.is_multigraph():
+            raise nx.NetworkXError(
+                "CompiledGraph not defined for multigraphs.")
+
+        nodes = list(graph.nodes())
+        index = dict((node, i) for i, node in enumerate(nodes))
+        adj = graph.adj
+
+        degrees = np.fromiter((len(adj[node]) for node in nodes),
+                              dtype=np.int64, count=len(nodes))
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(degrees, out=indptr[1:])
+
+        size = int(indptr[-1])
+        indices = np.fromiter((index[v] for node in nodes for v in adj[node]),
+                              dtype=_index_dtype(len(nodes)), count=size)
+        weights = [data.get(weight, default)
+                   for node in nodes for data in adj[node].values()]
+
+        return cls(nodes, indptr, indices, weights,
+                   directed=graph.is_directed())
+
+    @classmethod
+    def from_scipy(cls, matrix, nodes=None, directed=True):
+        """
+        Wrap a SciPy sparse adjacency matrix.
+
+        Every stored entry (i, j) is an edge i->j weighted by the
+        entry, duplicate entries are summed first. The indices and
+        data of a CSR matrix in canonical format are used without
+        copying when their dtypes allow it, the row pointer is
+        converted to int64. Other formats are converted to CSR
+        first. Undirected graphs need a symmetric matrix, with
+        the same stored entries above and below the diagonal.
+
+        :param matrix: Square SciPy sparse matrix
+        :param nodes: Node labels, the indices 0..n-1 if None
+        :param directed: Whether the graph is directed
+        :type directed: boolean, (default = True)
+        :return: Compiled graph
+        :rtype: CompiledGraph
+
+        :raises ValueError:
+            If matrix is not square, or not symmetric for an
+            undirected graph
+        """
+        matrix = matrix.tocsr()
+        n, m = matrix.shape
+        if n != m:
+            raise ValueError("Adjacency matrix must be square")
+        if not matrix.has_canonical_format:
+            # Duplicate entries would become parallel edges.
+            matrix = matrix.copy()
+            matrix.sum_duplicates()
+        if not directed and not _is_symmetric(matrix):
+            raise ValueError("Adjacency matrix of an undirected graph "
+                             "must be symmetric")
+        return cls(range(n) if nodes is None else nodes, matrix.indptr,
+                   matrix.indices, matrix.data, directed=directed)
+
+    @classmethod
+    def from_edges(cls, src, dst, weights=None, nodes=None, directed=True):
+        """
+        Compile edges given as arrays of node indices.
+
+        Edge e goes from src[e] to dst[e] with weight weights[e]. A
+        repeated edge keeps its first position and its last weight,
+        and for undirected graphs u-v and v-u are the same edge.
+
+        :param src: Source node indices
+        :param dst: Target node indices
+        :param weights: Edge weights, all 1 if None
+        :param nodes:
+            Node labels, position i is the label of index i. The
+            indices 0..n-1 if None, with n one more than the
+            largest index.
+        :param directed: Whether the graph is directed
+        :type directed: boolean, (default = True)
+        :return: Compiled graph
+        :rtype: CompiledGraph
+
+        :raises ValueError:
+            If an index is negative or not smaller than the number
+            of nodes
+        """
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        weights = np.ones(len(src), dtype=np.int64) if weights is None \
+            else _weight_array(weights)
+        if len(src) and min(src.min(), dst.min()) < 0:
+            raise ValueError("Node indices cannot be negative")
+        if nodes is None:
+            n = int(max(src.max(), dst.max())) + 1 if len(src) else 0
+            nodes = range(n)
+        else:
+            nodes = list(nodes)
+            n = len(nodes)
+            if len(src) and max(src.max(), dst.max()) >= n:
+                raise ValueError("Node index %d out of range for %d nodes"
+                                 % (max(src.max(), dst.max()), n))
+
+        indptr, indices, weights = _edge_csr(n, src, dst, weights, directed)
+        return cls(nodes, indptr, indices, weights, directed=directed)
+
+    @classmethod
+    def _from_arrays(cls, nodes, directed, out_indptr, out_indices,
+                     out_weights, in_indptr, in_indices, in_weights):
+        # Wrap existing arrays without validation, copying or transposing.
+        graph = cls.__new__(cls)
+        graph.nodes = nodes
+        graph.directed = directed
+        graph.out_indptr = out_indptr
+        graph.out_indices = out_indices
+        graph.out_weights = out_weights
+        graph._in = (in_indptr, in_indices, in_weights)
+        graph._index = None
+        return graph
+
+    @property
+    def in_indptr(self):
+        """Row pointer of the in-adjacency."""
+        return self._in_adjacency()[0]
+
+    @property
+    def in_indices(self):
+        """Column indices of the in-adjacency."""
+        return self._in_adjacency()[1]
+
+    @property
+    def in_weights(self):
+        """Edge weights of the in-adjacency."""
+        return self._in_adjacency()[2]
+
+    @property
+    def index(self):
+        """Dictionary mapping node labels to their integer index."""
+        if self._index is None:
+            self._index = dict((node, i) for i, node in enumerate(self.nodes))
+        return self._index
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def order(self):
+        """Number of nodes in the graph."""
+        return len(self.nodes)
+
+    def number_of_edges(self):
+        """Number of edges in the graph."""
+        if self.directed:
+            return len(self.out_indices)
+        return (len(self.out_indices) + len(self._self_loops())) // 2
+
+    def is_directed(self):
+        """True if the graph is directed."""
+        return self.directed
+
+    def successors(self, i):
+        """Indices of the out-neighbors of node index i."""
+        return self.out_indices[self.out_indptr[i]:self.out_indptr[i + 1]]
+
+    def predecessors(self, i):
+        """Indices of the in-neighbors of node index i."""
+        return self.in_indices[self.in_indptr[i]:self.in_indptr[i + 1]]
+
+    def to_undirected(self, combine='last'):
+        """
+        Return an undirected copy of the graph.
+
+        An edge u-v exists in the result if u->v or v->u exists.
+
+        :param combine:
+            How the weights of reciprocal edges u->v and v->u are
+            combined into the weight of u-v. One of
+            'min', 'max', 'sum' or 'last', which keeps the weight of
+            the edge leaving the node that comes later in the node
+            order, as NetworkX's to_undirected() does.
+        :type combine: string, (default = 'last')
+
+        :return: Undirected compiled graph
+        :rtype: CompiledGraph
+
+        :raises ValueError: If combine is not a known rule
+        """
+        if combine not in _COMBINE and combine != 'last':
+            raise ValueError("Unknown combine rule %r" % combine)
+
+        if not self.directed:
+            return self
+
+        # Row i of the symmetrized adjacency is out-row i followed by
+        # in-row i. A node adjacent both ways appears twice in its row
+        # and a self-loop is in both halves, such pairs are combined.
+        n = len(self.nodes)
+        out_degrees = np.diff(self.out_indptr)
+        indptr = self.out_indptr + self.in_indptr
+        out_edges = _ranges(indptr[:-1], indptr[:-1] + out_degrees)
+        in_edges = _ranges(indptr[:-1] + out_degrees, indptr[1:])
+        indices = np.empty(indptr[-1], dtype=self.out_indices.dtype)
+        indices[out_edges] = self.out_indices
+        indices[in_edges] = self.in_indices
+        weights = np.empty(indptr[-1], dtype=self.out_weights.dtype)
+        weights[out_edges] = self.out_weights
+        weights[in_edges] = self.in_weights
+        del out_edges
+
+        rows = _row_sources(indptr)
+        if combine == 'last':
+            # Source node of every arc, the neighbor in the in-half.
+            tails = rows.copy()
+            tails[in_edges] = self.in_indices
+        else:
+            tails = rows
+        loops = in_edges[self.in_indices == rows[in_edges]]
+        del in_edges
+        if len(loops):
+            keep = np.ones(len(indices), dtype=bool)
+            keep[loops] = False
+            rows, indices, weights, tails = (rows[keep], indices[keep],
+                                             weights[keep], tails[keep])
+
+        order = np.lexsort((tails, indices, rows))
+        rows, indices, weights = rows[order], indices[order], weights[order]
+        del order, tails
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = (rows[1:] != rows[:-1]) | (indices[1:] != indices[:-1])
+        starts = np.flatnonzero(first)
+        if len(starts) < len(rows):
+            if combine == 'last':
+                weights = weights[np.append(starts[1:], len(rows)) - 1]
+            else:
+                weights = _COMBINE[combine].reduceat(weights, starts)
+            rows, indices = rows[starts], indices[starts]
+
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+
+        return CompiledGraph(self.nodes, indptr, indices, weights,
+                             directed=False)
+
+    def subgraph(self, nodes):
+        """
+        Return the subgraph induced on nodes.
+
+        :param nodes: Iterable of node labels
+        :return: Induced subgraph
+        :rtype: CompiledGraph
+        """
+        index = self.index
+        return self._subgraph(np.array([index[node] for node in nodes],
+                                       dtype=np.int64))
+
+    def _subgraph(self, members):
+        members = np.unique(members)
+        position = np.full(len(self.nodes), -1, dtype=np.int64)
+        position[members] = np.arange(len(members))
+
+        starts = self.out_indptr[members]
+        stops = self.out_indptr[members + 1]
+        edges = _ranges(starts, stops)
+        rows = np.repeat(np.arange(len(members)), stops - starts)
+        targets = position[self.out_indices[edges]]
+        keep = targets >= 0
+
+        indptr = np.zeros(len(members) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows[keep], minlength=len(members)),
+                  out=indptr[1:])
+
+        return CompiledGraph([self.nodes[i] for i in members], indptr,
+                             targets[keep], self.out_weights[edges][keep],
+                             directed=self.directed)
+
+    def _in_adjacency(self):
+        if self._in is None:
+            self._in = _transpose(self.out_indptr, self.out_indices,
+                                  self.out_weights, len(self.nodes))
+        return self._in
+
+    def _self_loops(self):
+        return np.flatnonzero(self.out_indices ==
+                              _row_sources(self.out_indptr))
+
+
+def as_compiled(graph, to_undirected=False):
+    """
+    Return graph as a CompiledGraph, compiling NetworkX graphs.
+
+    Undirected results are symmetrized from the compiled in- and
+    out-adjacency, see :py:meth:`CompiledGraph.to_undirected`, so a
+    NetworkX graph is never copied. Reciprocal edges with different
+    weights keep, as NetworkX's to_undirected() would, the weight of
+    the edge leaving the later node, whatever the input type, so a
+    graph compiled once gives the same results as the NetworkX graph.
+
+    SciPy sparse matrices are wrapped with
+    :py:meth:`CompiledGraph.from_scipy` and tuples (src, dst) or
+    (src, dst, weights) of index arrays are compiled with
+    :py:meth:`CompiledGraph.from_edges`, both as directed graphs
+    whose nodes are the indices. Pass a CompiledGraph built by those
+    methods for labels or undirected graphs.
+
+    :param graph:
+        NetworkX graph, CompiledGraph, SciPy sparse matrix or
+        tuple of edge arrays
+    :param to_undirected: If True the result is undirected
+    :type to_undirected: boolean, (default = False)
+    :rtype: CompiledGraph
+    """
+    if isinstance(graph, CompiledGraph):
+        if to_undirected:
+            with instrumentation.phase('compile'):
+                return graph.to_undirected()
+        return graph
+
+    with instrumentation.phase('compile'):
+        if sparse is not None and sparse.issparse(graph):
+            graph = CompiledGraph.from_scipy(graph)
+        elif isinstance(graph, tuple):
+            graph = CompiledGraph.from_edges(*graph)
+        else:
+            graph = CompiledGraph.from_networkx(graph)
+        if to_undirected:
+            graph = graph.to_undirected()
+        return graph
+
+
+###############################################################################
+#                           HELPER FUNCTIONS
+###############################################################################
+
+
+_COMBINE = {
+    'min': np.minimum,
+    'max': np.maximum,
+    'sum': np.add,
+}
+
+
+def _index_dtype(n):
+    if n < np.iinfo(np.int32).max:
+        return np.int32
+    return np.int64
+
+
+def _weight_array(weights):
+    weights = np.asarray(weights)
+    if weights.dtype.kind in 'biu':
+        return weights.astype(np.int64, copy=False)
+    return weights.astype(np.float64, copy=False)
+
+
+def _is_symmetric(matrix):
+    # matrix is CSR in canonical format, so equal stored entries mean
+    # equal arrays.
+    transposed = matrix.transpose().tocsr()
+    transposed.sort_indices()
+    return (np.array_equal(matrix.indptr, transposed.indptr) and
+            np.array_equal(matrix.indices, transposed.indices) and
+            np.array_equal(matrix.data, transposed.data))
+
+
+def _row_sources(indptr):
+    return np.repeat(np.arange(len(indptr) - 1, dtype=np.int64),
+                     np.diff(indptr))
+
+
+def _ranges(starts, stops):
+    lengths = stops - starts
+    if len(lengths) == 0 or lengths.sum() == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.repeat(stops - lengths.cumsum(), lengths)
+    return offsets + np.arange(lengths.sum())
+
+
+def _row_sums(indptr, values):
+    lengths = np.diff(indptr)
+    sums = np.zeros(len(lengths), dtype=values.dtype)
+    rows = lengths > 0
+    if rows.any():
+        sums[rows] = np.add.reduceat(values, indptr[:-1][rows])
+    return sums
+
+
+def _records(nodes, blocks, chunk_size=None):
+    # Yield (node, value) pairs from blocks of (start, values) covering
+    # nodes in order, or lists of chunk_size pairs if chunk_size is set.
+    if chunk_size is not None and chunk_size < 1:
+        raise ValueError("Chunk size must be positive")
+    return _record_chunks(nodes, blocks, chunk_size)
+
+
+def _record_chunks(nodes, blocks, chunk_size):
+    pending = []
+    for start, values in blocks:
+        records = zip(nodes[start:start + len(values)], values)
+        if chunk_size is None:
+            for record in records:
+                yield record
+            continue
+        pending.extend(records)
+        while len(pending) >= chunk_size:
+            yield pending[:chunk_size]
+            del pending[:chunk_size]
+    if pending:
+        yield pending
+
+
+def _edge_csr(n, src, dst, weights, directed, explicit=None):
+    # CSR arrays of the edges src[e] -> dst[e], ordered by source and
+    # position. A repeated edge keeps its first position and the last
+    # weight with explicit set, or simply the last one.
+    if len(src) == 0:
+        return np.zeros(n + 1, dtype=np.int64), dst, weights
+
+    position = np.arange(len(src))
+    if explicit is None:
+        explicit = np.ones(len(src), dtype=bool)
+
+    if not directed:
+        # Store both directions of every edge, self-loops once.
+        mirror = np.flatnonzero(src != dst)
+        src, dst = (np.concatenate((src, dst[mirror])),
+                    np.concatenate((dst, src[mirror])))
+        weights = np.concatenate((weights, weights[mirror]))
+        explicit = np.concatenate((explicit, explicit[mirror]))
+        position = np.concatenate((position, mirror))
+
+    # Positions are already in order, except for mirrored edges.
+    keys = (explicit, src * n + dst) if directed else \
+        (position, explicit, src * n + dst)
+    order = np.lexsort(keys)
+    src, dst, weights, position = (src[order], dst[order], weights[order],
+                                   position[order])
+    first = np.ones(len(src), dtype=bool)
+    first[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+    starts = np.flatnonzero(first)
+    stops = np.append(starts[1:], len(src)) - 1
+    if len(starts):
+        position = np.minimum.reduceat(position, starts)
+    src, dst, weights = src[starts], dst[starts], weights[stops]
+
+    order = np.argsort(src * (len(explicit) + 1) + position)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr, dst[order], weights[order]
+
+
+def _transpose(indptr, indices, weights, n):
+    order = np.argsort(indices, kind='stable')
+    t_indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=n), out=t_indptr[1:])
+    t_indices = _row_sources(indptr)[order].astype(indices.dtype)
+    return t_indptr, t_indices, weights[order]
@@ -4,14 +4,25 @@
 __author__ = "Tanja Miličić"
 
 import networkx as nx
+import numpy as np
 
+from DiNetX import instrumentation
+from DiNetX.cache import cached
+from DiNetX.compiled import as_compiled, _records, _row_sums
 
+
+# Number of nodes whose centralities are converted at once by the
+# iter_* variants.
+_BLOCK_ROWS = 1 << 16
+
+
+@cached
 def degree_centrality(graph, alpha=1):
     """
     Degree centrality is a product of the node degree,
     and his average weight adjusted by the tuning parameter.
 
-    :param graph: NetworkX graph
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
 
     :param alpha: Positive tuning parameter
 
@@ -38,26 +49,19 @@ def degree_centrality(graph, alpha=1):
     if alpha < 0:
         raise ValueError("Alpha cannot be negative")
 
-    degree_dict = {}
-
-    for node in graph.nodes_iter():
-        k = graph.degree(node)
-        s = graph.degree(node, weight="weight")
-        try:
-            deg_centrality = k * (pow(s, alpha) / pow(k, alpha))
-            degree_dict[node] = deg_centrality
-        except ZeroDivisionError:
-            degree_dict[node] = 0
+    graph = as_compiled(graph)
+    k, s = _total_degrees(graph)
 
-    return degree_dict
+    return _centrality_dict(graph, k, s, alpha)
 
 
+@cached
 def out_degree_centrality(graph, alpha=1):
     """
     Out-degree centrality is a product of the node out-degree,
     and his average out weight adjusted by the tuning parameter.
 
-    :param graph: NetworkX graph
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
 
     :param alpha: Positive tuning parameter
 
@@ -83,33 +87,26 @@ def out_degree_centrality(graph, alpha=1):
             Soc. Netw. - SOC Netw., vol. 32, no. 3, pp. 245–251, 2010.
     """
 
-    if not graph.is_directed():
-        raise nx.NetworkXError(
-            "out_degree_centrality() not defined for undirected graphs.")
-
     if alpha < 0:
         raise ValueError("Alpha cannot be negative")
 
-    out_degree_dict = {}
+    graph = as_compiled(graph)
+    if not graph.is_directed():
+        raise nx.NetworkXError(
+            "out_degree_centrality() not defined for undirected graphs.")
 
-    for node in graph.nodes_iter():
-        k_out = graph.out_degree(node)
-        s_out = graph.out_degree(node, weight="weight")
-        try:
-            deg_centrality = k_out * (pow(s_out, alpha) / pow(k_out, alpha))
-            out_degree_dict[node] = deg_centrality
-        except ZeroDivisionError:
-            out_degree_dict[node] = 0
+    k_out, s_out = _degrees(graph.out_indptr, graph.out_weights)
 
-    return out_degree_dict
+    return _centrality_dict(graph, k_out, s_out, alpha)
 
 
+@cached
 def in_degree_centrality(graph, alpha=1):
     """
     In-degree centrality is a product of the node in-degree,
     and his average in weight adjusted by the tuning parameter.
 
-    :param graph: NetworkX graph
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
 
     :param alpha: Positive tuning parameter
     :type alpha: float
@@ -136,21 +133,211 @@ def in_degree_centrality(graph, alpha=1):
             Soc. Netw. - SOC Netw., vol. 32, no. 3, pp. 245–251, 2010.
     """
 
+    if alpha < 0:
+        raise ValueError("Alpha cannot be negative")
+
+    graph = as_compiled(graph)
     if not graph.is_directed():
         raise nx.NetworkXError(
             "in_degree_centrality() not defined for undirected graphs.")
 
+    k_in, s_in = _degrees(graph.in_indptr, graph.in_weights)
+
+    return _centrality_dict(graph, k_in, s_in, alpha)
+
+
+@cached
+def degree_centrality_matrix(graph, alphas):
+    """
+    Degree centralities of all nodes for many tuning parameters.
+
+    Degrees and strengths are computed once and every centrality
+    variant is evaluated for all alphas at once, which is much
+    cheaper than one call per alpha when sweeping the parameter.
+
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
+
+    :param alphas: Positive tuning parameters
+    :type alphas: list or array of floats
+
+    :return:
+        Matrices of shape (number of nodes, number of alphas)
+        under the keys 'degree', and for directed graphs also
+        'in_degree' and 'out_degree'. Column j holds the
+        centrality for alphas[j] and rows follow the node order
+        of the graph. Nodes without edges have centrality 0.
+    :rtype: dictionary
+
+    :raises ValueError: If any alpha is negative
+
+    .. seealso::
+        :py:func:`degree_centrality`, :py:func:`in_degree_centrality`,
+        :py:func:`out_degree_centrality`
+    """
+    alphas = np.atleast_1d(np.asarray(alphas, dtype=np.float64))
+    if (alphas < 0).any():
+        raise ValueError("Alpha cannot be negative")
+
+    graph = as_compiled(graph)
+    with instrumentation.phase('degree_centrality'):
+        matrices = {'degree': _centrality(*_total_degrees(graph),
+                                          alphas=alphas)}
+        if graph.is_directed():
+            matrices['in_degree'] = _centrality(
+                *_degrees(graph.in_indptr, graph.in_weights), alphas=alphas)
+            matrices['out_degree'] = _centrality(
+                *_degrees(graph.out_indptr, graph.out_weights), alphas=alphas)
+
+    return matrices
+
+
+def iter_degree_centrality(graph, alpha=1, chunk_size=None):
+    """
+    Generate degree centralities of all nodes in node order.
+
+    Degrees and strengths are kept as arrays and centralities are
+    computed and converted for blocks of nodes while the generator
+    is consumed, so no dictionary of all nodes is built.
+
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
+
+    :param alpha: Positive tuning parameter
+
+    :param chunk_size:
+        If given, lists of chunk_size records are yielded instead
+        of single records, the last one may be shorter.
+    :type chunk_size: int or None, (default = None)
+
+    :return: (node, degree centrality) records, or lists of them
+    :rtype: generator
+
+    :raises ValueError: If alpha is negative or chunk_size is not positive
+
+    .. seealso::
+        :py:func:`degree_centrality`
+    """
+
     if alpha < 0:
         raise ValueError("Alpha cannot be negative")
 
-    in_degree_dict = {}
-    for node in graph.nodes_iter():
-        k_in = graph.in_degree(node)
-        s_in = graph.in_degree(node, weight="weight")
-        try:
-            deg_centrality = k_in * (pow(s_in, alpha) / pow(k_in, alpha))
-            in_degree_dict[node] = deg_centrality
-        except ZeroDivisionError:
-            in_degree_dict[node] = 0
-
-    return in_degree_dict
+    graph = as_compiled(graph)
+    k, s = _total_degrees(graph)
+
+    return _records(graph.nodes, _centrality_blocks(k, s, alpha), chunk_size)
+
+
+def iter_out_degree_centrality(graph, alpha=1, chunk_size=None):
+    """
+    Generate out-degree centralities of all nodes in node order.
+
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
+
+    :param alpha: Positive tuning parameter
+
+    :param chunk_size: Number of records per yielded list, or None
+    :type chunk_size: int or None, (default = None)
+
+    :return: (node, out-degree centrality) records, or lists of them
+    :rtype: generator
+
+    :raises NetworkXError: If graph is undirected
+
+    :raises ValueError: If alpha is negative or chunk_size is not positive
+
+    .. seealso::
+        :py:func:`out_degree_centrality`, :py:func:`iter_degree_centrality`
+    """
+
+    if alpha < 0:
+        raise ValueError("Alpha cannot be negative")
+
+    graph = as_compiled(graph)
+    if not graph.is_directed():
+        raise nx.NetworkXError(
+            "out_degree_centrality() not defined for undirected graphs.")
+
+    k_out, s_out = _degrees(graph.out_indptr, graph.out_weights)
+
+    return _records(graph.nodes, _centrality_blocks(k_out, s_out, alpha),
+                    chunk_size)
+
+
+def iter_in_degree_centrality(graph, alpha=1, chunk_size=None):
+    """
+    Generate in-degree centralities of all nodes in node order.
+
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
+
+    :param alpha: Positive tuning parameter
+
+    :param chunk_size: Number of records per yielded list, or None
+    :type chunk_size: int or None, (default = None)
+
+    :return: (node, in-degree centrality) records, or lists of them
+    :rtype: generator
+
+    :raises NetworkXError: If graph is undirected
+
+    :raises ValueError: If alpha is negative or chunk_size is not positive
+
+    .. seealso::
+        :py:func:`in_degree_centrality`, :py:func:`iter_degree_centrality`
+    """
+
+    if alpha < 0:
+        raise ValueError("Alpha cannot be negative")
+
+    graph = as_compiled(graph)
+    if not graph.is_directed():
+        raise nx.NetworkXError(
+            "in_degree_centrality() not defined for undirected graphs.")
+
+    k_in, s_in = _degrees(graph.in_indptr, graph.in_weights)
+
+    return _records(graph.nodes, _centrality_blocks(k_in, s_in, alpha),
+                    chunk_size)
+
+
+def _degrees(indptr, weights):
+    return np.diff(indptr), _row_sums(indptr, weights)
+
+
+def _total_degrees(graph):
+    k_out, s_out = _degrees(graph.out_indptr, graph.out_weights)
+    if graph.is_directed():
+        k_in, s_in = _degrees(graph.in_indptr, graph.in_weights)
+    else:
+        # Undirected self-loops count twice, as in NetworkX.
+        loops = graph._self_loops()
+        k_in = np.bincount(graph.out_indices[loops],
+                           minlength=graph.order())
+        s_in = np.bincount(graph.out_indices[loops],
+                           weights=graph.out_weights[loops],
+                           minlength=graph.order())
+    return k_out + k_in, s_out + s_in
+
+
+def _centrality(k, s, alphas):
+    # k * s^alpha / k^alpha, with nodes of degree zero masked to 0.
+    k = k.astype(np.float64)[:, np.newaxis]
+    s = s.astype(np.float64)[:, np.newaxis]
+    connected = k[:, 0] > 0
+    centrality = np.zeros((len(k), len(alphas)))
+    centrality[connected] = k[connected] * (
+        np.power(s[connected], alphas) / np.power(k[connected], alphas))
+    return centrality
+
+
+def _centrality_dict(graph, k, s, alpha):
+    with instrumentation.phase('degree_centrality'):
+        return dict(zip(graph.nodes,
+                        _centrality(k, s, [alpha])[:, 0].tolist()))
+
+
+def _centrality_blocks(k, s, alpha, rows=_BLOCK_ROWS):
+    # Yield (start, centralities) for consecutive blocks of nodes.
+    for start in range(0, len(k), rows):
+        with instrumentation.phase('degree_centrality'):
+            values = _centrality(k[start:start + rows], s[start:start + rows],
+                                 [alpha])[:, 0].tolist()
+        yield start, values
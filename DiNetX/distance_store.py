@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import itertools
+import json
+import os
+import pickle
+
+import numpy as np
+
+from DiNetX import instrumentation
+from DiNetX.cache import fingerprint
+from DiNetX.compiled import as_compiled
+from DiNetX.parallel import map_sources
+from DiNetX.shortest_paths import shortest_path_lengths
+
+
+# Bump when the layout of a store changes.
+_STORE_VERSION = 2
+
+# Rows computed before a block is written to the file.
+_BLOCK_ROWS = 256
+
+_MATRIX = 'distances.npy'
+_SUMS = 'inverse_sums.npy'
+_NODES = 'nodes.pkl'
+_META = 'meta.json'
+
+
+class DistanceStore(object):
+    """
+    All-pairs shortest path lengths kept in a memory-mapped file.
+
+    A store is a directory holding the n x n length matrix as a
+    ``.npy`` file, where row i holds the lengths from node index i,
+    together with sum_j 1/d_ij of every row and the node labels.
+    Opening a store maps the matrix read-only, so rows are paged in
+    from disk only when they are read.
+
+    Unreachable pairs hold the largest value of an integer dtype or
+    infinity for a floating point dtype. :py:meth:`rows` converts
+    them to infinity.
+
+    :param path: Directory of a store written by :py:meth:`build`
+
+    :ivar nodes: Node labels, position i is the label of index i
+    :ivar weight: False if lengths are numbers of hops
+    :ivar directed: Whether the graph was directed
+    :ivar fingerprint: Fingerprint of the graph, see
+        :py:func:`DiNetX.cache.fingerprint`
+    :ivar matrix: Read-only memory map of the length matrix
+    :ivar inverse_sums: sum_j 1/d_ij of every row, computed exactly
+
+    .. seealso::
+        :py:func:`DiNetX.efficiency.global_efficiency`,
+        :py:func:`DiNetX.efficiency.nodal_efficiency`
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, _META)) as f:
+            meta = json.load(f)
+        if meta.get('version') != _STORE_VERSION:
+            raise ValueError("Unsupported distance store version %r"
+                             % meta.get('version'))
+        with open(os.path.join(path, _NODES), 'rb') as f:
+            self.nodes = pickle.load(f)
+
+        self.path = path
+        self.weight = meta['weight']
+        self.directed = meta['directed']
+        self.fingerprint = meta['fingerprint']
+        self.matrix = np.load(os.path.join(path, _MATRIX), mmap_mode='r')
+        self.inverse_sums = np.load(os.path.join(path, _SUMS))
+
+    @classmethod
+    def build(cls, graph, path, weight=True, to_undirected=False, dtype=None,
+              n_jobs=1, engine='auto', block_rows=_BLOCK_ROWS):
+        """
+        Compute all shortest path lengths of graph and write them to
+        a new store.
+
+        Rows are computed and written block_rows at a time, so memory
+        use does not grow with the size of the matrix.
+
+        :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
+        :param path: Directory of the store, created if missing
+
+        :param weight:
+            If True lengths are sums of edge weights, else numbers
+            of hops.
+        :type weight: boolean, (default = True)
+
+        :param to_undirected: If True all edges will become undirected.
+        :type to_undirected: boolean, (default = False)
+
+        :param dtype:
+            Dtype of the stored lengths. By default hops use the
+            smallest of uint8, uint16 and uint32 that holds n - 1 and
+            weighted lengths use float32. Integer dtypes require
+            integer weights.
+        :type dtype: NumPy dtype or None, (default = None)
+
+        :param n_jobs: Number of processes writing rows
+        :type n_jobs: int, (default = 1)
+
+        :param engine: Weighted shortest path engine
+        :type engine: string, (default = 'auto')
+
+        :param block_rows: Number of rows written at once
+        :type block_rows: int, (default = 256)
+
+        :return: The new store, opened for reading
+        :rtype: DistanceStore
+
+        :raises ValueError:
+            If dtype cannot hold the lengths of the graph
+        """
+        graph = as_compiled(graph, to_undirected is True)
+        weight = weight is True
+        n = graph.order()
+        dtype = _length_dtype(graph, weight, dtype)
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        filename = os.path.join(path, _MATRIX)
+        matrix = np.lib.format.open_memmap(filename, mode='w+', dtype=dtype,
+                                           shape=(n, n))
+        del matrix
+
+        with instrumentation.phase('shortest_paths'):
+            sums = map_sources(_write_rows, graph, n, n_jobs,
+                               (filename, weight, engine, block_rows))
+        np.save(os.path.join(path, _SUMS), np.array(sums, dtype=np.float64))
+        with open(os.path.join(path, _NODES), 'wb') as f:
+            pickle.dump(graph.nodes, f, pickle.HIGHEST_PROTOCOL)
+        # The metadata is written last, a store without it is incomplete.
+        with open(os.path.join(path, _META), 'w') as f:
+            json.dump({'version': _STORE_VERSION, 'weight': weight,
+                       'directed': graph.is_directed(),
+                       'fingerprint': fingerprint(graph)}, f)
+
+        return cls(path)
+
+    def order(self):
+        """Number of nodes in the store."""
+        return len(self.nodes)
+
+    def rows(self, start, stop):
+        """
+        Lengths from node indices start..stop-1 as a float64 array,
+        with infinity for unreachable nodes.
+        """
+        block = np.asarray(self.matrix[start:stop])
+        lengths = block.astype(np.float64)
+        if block.dtype.kind in 'iu':
+            lengths[block == _unreachable(block.dtype)] = np.inf
+        return lengths
+
+    def global_efficiency(self):
+        """Global efficiency of the stored graph."""
+        n = self.order()
+        if n < 2:
+            return 0
+        return 1. / (n * (n - 1)) * _ordered_sum(self.inverse_sums)
+
+    def nodal_efficiency(self):
+        """Nodal efficiency of every node, keyed by label."""
+        n = self.order()
+        if n < 2:
+            return dict((node, 0) for node in self.nodes)
+        return dict(zip(self.nodes, (self.inverse_sums / (n - 1)).tolist()))
+
+    def check(self, graph, weight):
+        """
+        Raise ValueError unless the store holds lengths of the
+        compiled graph with the given weight setting. Graphs are
+        compared by direction and fingerprint, so a store built
+        before any edge or weight changed is refused.
+        """
+        if self.weight != (weight is True):
+            raise ValueError("Distance store was built with weight=%r"
+                             % self.weight)
+        if self.directed != graph.is_directed():
+            raise ValueError("Distance store was built for %s graph"
+                             % ('a directed' if self.directed
+                                else 'an undirected'))
+        if self.fingerprint != fingerprint(graph):
+            raise ValueError("Distance store was built for another graph")
+
+
+###############################################################################
+#                           HELPER FUNCTIONS
+###############################################################################
+
+
+def _length_dtype(graph, weight, dtype):
+    integral = not weight or graph.out_weights.dtype.kind == 'i'
+    if dtype is None:
+        if weight:
+            return np.dtype(np.float32)
+        n = graph.order()
+        for candidate in (np.uint8, np.uint16, np.uint32):
+            if n <= np.iinfo(candidate).max:
+                return np.dtype(candidate)
+        return np.dtype(np.uint64)
+
+    dtype = np.dtype(dtype)
+    if dtype.kind in 'iu' and not integral:
+        raise ValueError("Integer dtype %s requires integer weights" % dtype)
+    if dtype.kind not in 'iuf':
+        raise ValueError("Unsupported length dtype %s" % dtype)
+    return dtype
+
+
+def _unreachable(dtype):
+    if dtype.kind in 'iu':
+        return np.iinfo(dtype).max
+    return np.inf
+
+
+def _ordered_sum(values):
+    # Add left to right like the per-source loop of global_efficiency.
+    total = 0
+    for value in values.tolist():
+        total += value
+    return total
+
+
+def _write_rows(graph, start, stop, filename, weight, engine, block_rows):
+    matrix = np.load(filename, mmap_mode='r+')
+    n = graph.order()
+    unreachable = _unreachable(matrix.dtype)
+    searches = shortest_path_lengths(graph, range(start, stop), weight, engine)
+    sums = []
+
+    for block_start in range(start, stop, block_rows):
+        block_stop = min(block_start + block_rows, stop)
+        block = np.full((block_stop - block_start, n), unreachable,
+                        dtype=matrix.dtype)
+        for row, (reached, lengths) in zip(
+                block, itertools.islice(searches, block_stop - block_start)):
+            if matrix.dtype.kind in 'iu' and max(lengths) >= unreachable:
+                raise ValueError("Lengths do not fit in dtype %s"
+                                 % matrix.dtype)
+            row[reached] = lengths
+            sums.append(sum(1. / d_ij for d_ij in lengths if d_ij != 0))
+        matrix[block_start:block_stop] = block
+
+    matrix.flush()
+    return sums
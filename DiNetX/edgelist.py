@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import os
+
+import numpy as np
+
+from DiNetX import instrumentation
+from DiNetX.compiled import CompiledGraph, _edge_csr
+from DiNetX.degree_centrality import _centrality
+
+
+# Bytes read from the file at a time. Chunks end at a line break.
+_CHUNK_BYTES = 1 << 26
+
+# Bytes separating tokens, as for bytes.split(), marked by byte value.
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[list(b' \t\n\r\x0b\x0c')] = True
+
+
+def read_edgelist(path, directed=True, delimiter=None, comments='#',
+                  weighted=True, default=1, nodetype=None,
+                  chunk_bytes=_CHUNK_BYTES):
+    """
+    Read a graph from an edge list file into a CompiledGraph.
+
+    Every line holds a source, a target and optionally a weight,
+    separated by whitespace or by delimiter. The file is read in
+    chunks of whole lines that are split into tokens and interned
+    with NumPy. The token objects of a chunk are released before
+    the next chunk is read, so the memory peak is a few arrays of
+    the number of edges plus the tokens of one chunk.
+
+    Nodes are indexed in the order of their first appearance and
+    a repeated edge keeps its first position and its last weight,
+    which gives the same graph as reading the file with NetworkX.
+    A file without edges, empty or only comments, gives a graph
+    without nodes.
+
+    :param path: File name
+
+    :param directed: Whether edges are directed
+    :type directed: boolean, (default = True)
+
+    :param delimiter: Column separator, any whitespace if None
+    :type delimiter: string or None, (default = None)
+
+    :param comments: Text starting a comment until the end of line
+    :type comments: string or None, (default = '#')
+
+    :param weighted:
+        If True the third column is the edge weight, lines
+        without it get default.
+    :type weighted: boolean, (default = True)
+
+    :param default: Weight of edges without one
+    :type default: int or float, (default = 1)
+
+    :param nodetype: Function converting node labels, str if None
+    :type nodetype: callable or None, (default = None)
+
+    :param chunk_bytes: Approximate number of bytes parsed at once
+    :type chunk_bytes: int
+
+    :return: Compiled graph
+    :rtype: CompiledGraph
+
+    :raises ValueError: If a line has fewer than two columns
+
+    .. seealso::
+        :py:func:`stream_degree_centrality`
+    """
+    labels = _Labels()
+    sources, targets, weights, explicit = [], [], [], []
+
+    with instrumentation.phase('compile'):
+        for chunk in _read_chunks(path, chunk_bytes):
+            ends, chunk_weights, given = _parse(chunk, delimiter, comments,
+                                                weighted, default)
+            ids = labels.ids(ends)
+            sources.append(ids[0::2])
+            targets.append(ids[1::2])
+            weights.append(chunk_weights)
+            explicit.append(given)
+
+        n = len(labels)
+        src = np.concatenate(sources) if sources else np.zeros(0, np.int64)
+        dst = np.concatenate(targets) if targets else np.zeros(0, np.int64)
+        weights = _concatenate_weights(weights, default)
+        explicit = np.concatenate(explicit) if explicit else \
+            np.zeros(0, dtype=bool)
+        indptr, indices, weights = _edge_csr(n, src, dst, weights, directed,
+                                             explicit)
+
+        return CompiledGraph(labels.nodes(nodetype), indptr, indices,
+                             weights, directed=directed)
+
+
+def stream_degree_centrality(path, alpha=1, directed=True, delimiter=None,
+                             comments='#', weighted=True, default=1,
+                             nodetype=None, chunk_bytes=_CHUNK_BYTES):
+    """
+    Compute degree centralities from an edge list file in one pass.
+
+    Only degrees and strengths of the nodes are accumulated while
+    the file is read, so memory grows with the number of nodes and
+    not with the number of edges. Every line counts as one edge,
+    repeated edges are not merged as in :py:func:`read_edgelist`.
+
+    :param path: File name
+    :param alpha: Positive tuning parameter
+    :param directed: Whether edges are directed
+    :param delimiter: Column separator, any whitespace if None
+    :param comments: Text starting a comment until the end of line
+    :param weighted: If True the third column is the edge weight
+    :param default: Weight of edges without one
+    :param nodetype: Function converting node labels, str if None
+    :param chunk_bytes: Approximate number of bytes parsed at once
+
+    :return:
+        Values of degree centrality for each node under the key
+        'degree', and for directed edges also of in-degree and
+        out-degree centrality under 'in_degree' and 'out_degree'.
+    :rtype: dictionary of dictionaries
+
+    :raises ValueError: If alpha is negative
+
+    .. seealso::
+        :py:func:`DiNetX.degree_centrality.degree_centrality`,
+        :py:func:`read_edgelist`
+    """
+    if alpha < 0:
+        raise ValueError("Alpha cannot be negative")
+
+    labels = _Labels()
+    k_out = np.zeros(0, dtype=np.int64)
+    k_in = np.zeros(0, dtype=np.int64)
+    s_out = np.zeros(0)
+    s_in = np.zeros(0)
+
+    for chunk in _read_chunks(path, chunk_bytes):
+        ends, weights, _ = _parse(chunk, delimiter, comments, weighted,
+                                  default)
+        ids = labels.ids(ends)
+        n = len(labels)
+        weights = weights.astype(np.float64)
+        k_out = _grow(k_out, n) + np.bincount(ids[0::2], minlength=n)
+        k_in = _grow(k_in, n) + np.bincount(ids[1::2], minlength=n)
+        s_out = _grow(s_out, n) + np.bincount(ids[0::2], weights, n)
+        s_in = _grow(s_in, n) + np.bincount(ids[1::2], weights, n)
+
+    nodes = labels.nodes(nodetype)
+    with instrumentation.phase('degree_centrality'):
+        centralities = {'degree': _centrality(k_out + k_in, s_out + s_in,
+                                              [alpha])[:, 0]}
+        if directed:
+            centralities['in_degree'] = _centrality(k_in, s_in, [alpha])[:, 0]
+            centralities['out_degree'] = _centrality(k_out, s_out,
+                                                     [alpha])[:, 0]
+
+    return dict((key, dict(zip(nodes, values.tolist())))
+                for key, values in centralities.items())
+
+
+###############################################################################
+#                           HELPER FUNCTIONS
+###############################################################################
+
+
+class _Labels(object):
+    # Interns byte string labels to indices in order of first appearance.
+
+    def __init__(self):
+        self._index = {}
+        self._labels = []
+
+    def __len__(self):
+        return len(self._labels)
+
+    def ids(self, labels):
+        if len(labels) == 0:
+            return np.zeros(0, dtype=np.int64)
+        if labels.dtype.itemsize <= 8:
+            # Short labels are compared as integers, much faster than
+            # sorting them as strings.
+            keys = labels.astype('S8').view(np.uint64)
+            unique, first, inverse = np.unique(keys, return_index=True,
+                                               return_inverse=True)
+            unique = unique.view('S8')
+        else:
+            unique, first, inverse = np.unique(labels, return_index=True,
+                                               return_inverse=True)
+        order = np.argsort(first, kind='stable')
+        ids = np.empty(len(unique), dtype=np.int64)
+        index = self._index
+        for position, label in zip(order.tolist(), unique[order].tolist()):
+            i = index.get(label)
+            if i is None:
+                i = index[label] = len(self._labels)
+                self._labels.append(label)
+            ids[position] = i
+        return ids[inverse.reshape(-1)]
+
+    def nodes(self, nodetype=None):
+        nodes = [label.decode('utf-8') for label in self._labels]
+        if nodetype is not None:
+            nodes = [nodetype(node) for node in nodes]
+        return nodes
+
+
+def _read_chunks(path, chunk_bytes):
+    with open(path, 'rb') as f:
+        # read() allocates the whole request up front, so small files
+        # are read in one chunk of their size.
+        chunk_bytes = max(1, min(chunk_bytes, os.fstat(f.fileno()).st_size))
+        rest = b''
+        while True:
+            data = f.read(chunk_bytes)
+            if not data:
+                break
+            data = rest + data
+            end = data.rfind(b'\n') + 1
+            rest = data[end:]
+            if end:
+                yield data[:end]
+        if rest:
+            yield rest
+
+
+def _parse(chunk, delimiter, comments, weighted, default):
+    # Return the labels of both ends of every edge interleaved as
+    # source, target, source, ..., the weights and whether each
+    # weight was given on its line.
+    if comments is not None and comments.encode() in chunk:
+        comments = comments.encode()
+        chunk = b'\n'.join(line.split(comments, 1)[0]
+                           for line in chunk.split(b'\n'))
+    if delimiter is not None:
+        chunk = chunk.replace(delimiter.encode(), b' ')
+
+    tokens = chunk.split()
+    lines = chunk.count(b'\n') + (not chunk.endswith(b'\n'))
+    columns = len(chunk.split(b'\n', 1)[0].split())
+
+    if columns >= 2 and len(tokens) == columns * lines and \
+            _uniform_columns(chunk, columns, lines):
+        tokens = np.array(tokens, dtype=np.bytes_).reshape(lines, columns)
+        given = weighted and columns > 2
+        if given:
+            weights = _parse_weights(tokens[:, 2])
+        else:
+            weights = np.full(lines, default)
+        return tokens[:, :2].ravel(), weights, np.full(lines, given)
+
+    ends = []
+    weights = []
+    given = []
+    for line in chunk.split(b'\n'):
+        row = line.split()
+        if not row:
+            continue
+        if len(row) < 2:
+            raise ValueError("Edge list line %r has fewer than two columns"
+                             % line.decode('utf-8', 'replace'))
+        ends.extend(row[:2])
+        given.append(weighted and len(row) > 2)
+        weights.append(row[2] if given[-1] else str(default).encode())
+    return (np.array(ends, dtype=np.bytes_), _parse_weights(weights),
+            np.array(given, dtype=bool))
+
+
+def _uniform_columns(chunk, columns, lines):
+    # Whether every line of chunk has exactly columns tokens, counting
+    # the bytes that start a token on each line.
+    data = np.frombuffer(chunk, dtype=np.uint8)
+    space = _WHITESPACE[data]
+    starts = ~space
+    starts[1:] &= space[:-1]
+    line = np.searchsorted(np.flatnonzero(data == ord('\n')),
+                           np.flatnonzero(starts))
+    counts = np.bincount(line, minlength=lines)
+    return len(counts) == lines and bool((counts == columns).all())
+
+
+def _parse_weights(tokens):
+    tokens = np.array(tokens, dtype=np.bytes_)
+    try:
+        return tokens.astype(np.int64)
+    except ValueError:
+        return tokens.astype(np.float64)
+
+
+def _concatenate_weights(weights, default):
+    if not weights:
+        return np.zeros(0, dtype=np.asarray(default).dtype)
+    return np.concatenate(weights)
+
+
+def _grow(values, n):
+    if len(values) < n:
+        values = np.concatenate((values, np.zeros(n - len(values),
+                                                  dtype=values.dtype)))
+    return values
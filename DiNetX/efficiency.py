@@ -4,14 +4,41 @@
 __author__ = "Tanja Miličić"
 
 
+import collections
+import heapq
+import math
+import statistics
+import time
+
 import networkx as nx
+import numpy as np
+
+from DiNetX import instrumentation
+from DiNetX.cache import cached
+from DiNetX.checkpoint import checkpoint_key, checkpointed_map
+from DiNetX.compiled import CompiledGraph, _row_sources, as_compiled
+from DiNetX.distance_store import DistanceStore
+from DiNetX.parallel import map_sources
+from DiNetX.shortest_paths import (bfs_inverse_sums, dijkstra_inverse_sums,
+                                   search_function, shortest_path_lengths)
+
+
+# Sources whose partial sums are returned as one vector by vulnerability.
+_VULNERABILITY_BLOCK = 256
+
+# Smallest neighborhood whose hop counts local_efficiency takes from
+# the bit-parallel BFS. Below it the NumPy overhead of a sweep costs
+# more than plain searches.
+_LOCAL_BFS_MIN = 16
 
 
-def global_efficiency(graph, weight=True, to_undirected=False):
+@cached
+def global_efficiency(graph, weight=True, to_undirected=False, n_jobs=1,
+                      engine='auto', distances=None, checkpoint=None):
     """
     Compute value of global efficiency for a given graph.
 
-    :param graph: NetworkX graph
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
 
     :param weight:
         If True then all shortest paths will be computed
@@ -26,32 +53,68 @@ def global_efficiency(graph, weight=True, to_undirected=False):
 
     :type to_undirected: boolean, (default = False)
 
+    :param n_jobs:
+        Number of processes used for the shortest path runs.
+        Source nodes are split into contiguous ranges that are
+        processed in parallel over a shared memory copy of the
+        graph. The result is identical to the serial one.
+        -1 uses all CPUs.
+
+    :type n_jobs: int, (default = 1)
+
+    :param engine:
+        Weighted shortest path engine, 'dial' for a bucket queue
+        over integer weights or 'heap' for a binary heap. 'auto'
+        chooses by the dtype of the edge weights.
+
+    :type engine: string, (default = 'auto')
+
+    :param distances:
+        A DistanceStore of graph to read the result from instead
+        of running any search, or the directory of a new store
+        that is written while the shortest paths are computed.
+
+    :type distances: DistanceStore, string or None, (default = None)
+
+    :param checkpoint:
+        Directory where the sums of finished sources are saved
+        about once a minute. A run interrupted for any reason
+        continues from the last save when it is called again with
+        the same directory, and the result is identical to an
+        uninterrupted run. The directory is removed at the end.
+
+    :type checkpoint: string or None, (default = None)
+
     :return: Value of global efficiency for given graph
     :rtype: dictionary
 
+    :raises ValueError:
+        If distances is a store of another graph or weight setting,
+        or checkpoint holds a checkpoint of another computation
+
     .. seealso::
-        :py:func:`local_efficiency`
+        :py:func:`local_efficiency`, :py:class:`DistanceStore`,
+        :py:class:`DiNetX.checkpoint.Checkpoint`
 
     Reference
         .. [1] V. Latora and M. Marchiori,
             “Efficient Behavior of Small-World Networks”,
             Phys.Rev. Lett., vol. 87, no. 19, Oct. 2001.
     """
+    graph = as_compiled(graph, to_undirected is True)
+    store = _distance_store(graph, weight, n_jobs, engine, distances)
+    if store is not None:
+        return store.global_efficiency()
+
     n = graph.order()
     sum_dij = 0
 
-    if to_undirected is True:
-        graph = graph.to_undirected()
-
-    if weight is True:
-        for node in graph.nodes():
-            shortest_paths = nx.single_source_dijkstra_path_length(graph, node)
-            sum_dij += sum(1 / d_ij for d_ij in shortest_paths.values() if d_ij != 0)
-
-    else:
-        for node in graph.nodes():
-            shortest_paths = nx.single_source_shortest_path_length(graph, node)
-            sum_dij += sum(1 / d_ij for d_ij in shortest_paths.values() if d_ij != 0)
+    # Partial sums are added in source order, so the parallel and the
+    # resumed results are bit for bit equal to the serial one.
+    with instrumentation.phase('shortest_paths'):
+        for source_sum in _inverse_sums(graph, weight, n_jobs, engine,
+                                        checkpoint):
+            sum_dij += source_sum
 
     try:
         efficiency = 1. / (n * (n - 1)) * sum_dij
@@ -61,13 +124,256 @@ def global_efficiency(graph, weight=True, to_undirected=False):
     return efficiency
 
 
+@cached
+def nodal_efficiency(graph, weight=True, to_undirected=False, n_jobs=1,
+                     engine='auto', distances=None, checkpoint=None):
+    """
+    Compute nodal efficiency of each node, the mean of 1/d_ij
+    over all other nodes j. Global efficiency is the average
+    of nodal efficiencies.
+
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
+
+    :param weight:
+        If True then all shortest paths will be computed
+        as a sum of weights of all traversed edges.
+        Else shortest paths will be sum of jumps needed
+        from one node to every other.
+    :type weight: boolean, (default = True)
+
+    :param to_undirected: If True all edges will become undirected.
+    :type to_undirected: boolean, (default = False)
+
+    :param n_jobs: Number of processes used for the shortest path runs
+    :type n_jobs: int, (default = 1)
+
+    :param engine: Weighted shortest path engine
+    :type engine: string, (default = 'auto')
+
+    :param distances:
+        A DistanceStore of graph to read from, or the directory
+        of a new store, see :py:func:`global_efficiency`.
+    :type distances: DistanceStore, string or None, (default = None)
+
+    :param checkpoint:
+        Directory of a checkpoint to resume from and save to, see
+        :py:func:`global_efficiency`. Both functions share the
+        checkpoint of a graph and weight setting.
+    :type checkpoint: string or None, (default = None)
+
+    :return: Values of nodal efficiency for each node
+    :rtype: dictionary
+
+    .. seealso::
+        :py:func:`global_efficiency`
+
+    Reference
+        .. [1] S. Achard and E. Bullmore,
+            "Efficiency and Cost of Economical Brain Functional Networks",
+            PLoS Comput. Biol., vol. 3, no. 2, 2007.
+    """
+    graph = as_compiled(graph, to_undirected is True)
+    store = _distance_store(graph, weight, n_jobs, engine, distances)
+    if store is not None:
+        return store.nodal_efficiency()
+
+    n = graph.order()
+    with instrumentation.phase('shortest_paths'):
+        sums = _inverse_sums(graph, weight, n_jobs, engine, checkpoint)
+    if n < 2:
+        return dict((node, 0) for node in graph.nodes)
+    return dict((node, source_sum / (n - 1))
+                for node, source_sum in zip(graph.nodes, sums))
+
+
+@cached
+def vulnerability(graph, nodes=None, weight=True, to_undirected=False,
+                  n_jobs=1, engine='auto', distances=None):
+    """
+    Compute vulnerability of nodes, the relative drop of global
+    efficiency when the node and its edges are removed,
+    (E - E_k) / E.
+
+    Removing node k changes the lengths from a source only if k is
+    the only predecessor of some node on the shortest paths from
+    that source. Every source is searched once, and only when k is
+    such a predecessor it is searched again without k, for hop
+    counts with the bit-parallel BFS over all those sources at
+    once. For every other source the sum of 1/d_ij just loses the
+    term of k.
+
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
+
+    :param nodes: Nodes to remove one at a time, all nodes if None
+    :type nodes: iterable or None, (default = None)
+
+    :param weight:
+        If True then all shortest paths will be computed
+        as a sum of weights of all traversed edges.
+        Else shortest paths will be sum of jumps needed
+        from one node to every other.
+    :type weight: boolean, (default = True)
+
+    :param to_undirected: If True all edges will become undirected.
+    :type to_undirected: boolean, (default = False)
+
+    :param n_jobs:
+        Number of processes, each handling contiguous blocks
+        of sources. -1 uses all CPUs.
+    :type n_jobs: int, (default = 1)
+
+    :param engine: Weighted shortest path engine
+    :type engine: string, (default = 'auto')
+
+    :param distances:
+        A DistanceStore of graph whose rows replace the first
+        search from every source, or the directory of a new store,
+        see :py:func:`global_efficiency`. Lengths of a float32
+        store carry its rounding into the result.
+    :type distances: DistanceStore, string or None, (default = None)
+
+    :return: Values of vulnerability for each node, 0 if E is 0
+    :rtype: dictionary
+
+    .. seealso::
+        :py:func:`global_efficiency`
+
+    Reference
+        .. [1] V. Latora and M. Marchiori,
+            "Vulnerability and protection of infrastructure networks",
+            Phys. Rev. E, vol. 71, no. 1, 2005.
+    """
+    graph = as_compiled(graph, to_undirected is True)
+    n = graph.order()
+    if nodes is None:
+        nodes = graph.nodes
+        removed = np.arange(n)
+    else:
+        index = graph.index
+        nodes = list(nodes)
+        removed = np.array([index[node] for node in nodes], dtype=np.int64)
+
+    store = _distance_store(graph, weight, n_jobs, engine, distances)
+    path = store.path if store is not None else None
+
+    # Sources are handed out in blocks, each returning one vector of
+    # partial sums, so the results do not grow with n * len(nodes).
+    with instrumentation.phase('shortest_paths'):
+        partials = map_sources(_vulnerability_sums, graph,
+                               (n + _VULNERABILITY_BLOCK - 1) //
+                               _VULNERABILITY_BLOCK, n_jobs,
+                               (removed, weight is True, engine, path))
+    totals = np.zeros(len(removed) + 1)
+    for partial in partials:
+        totals += partial
+
+    efficiency = totals[-1] / (n * (n - 1)) if n > 1 else 0
+    if efficiency == 0:
+        return dict((node, 0) for node in nodes)
+    if n > 2:
+        removed_efficiency = totals[:-1] / ((n - 1) * (n - 2))
+    else:
+        removed_efficiency = totals[:-1] * 0
+    return dict(zip(nodes, ((efficiency - removed_efficiency) /
+                            efficiency).tolist()))
+
+
+EfficiencyEstimate = collections.namedtuple(
+    'EfficiencyEstimate', ['efficiency', 'stderr', 'low', 'high', 'samples'])
+
+
+@cached
+def approximate_global_efficiency(graph, samples=100, seed=None, weight=True,
+                                  to_undirected=False, rel_error=None,
+                                  confidence=0.95):
+    """
+    Estimate global efficiency from shortest paths of sampled sources.
+
+    Global efficiency is the mean over source nodes i of
+    sum_j 1/d_ij divided by n - 1, so it is estimated by the
+    same mean taken over pivot sources drawn uniformly without
+    replacement. Only the pivots run a shortest path search.
+
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
+
+    :param samples: Number of pivot sources
+    :type samples: int, (default = 100)
+
+    :param seed: Seed of the random pivot selection
+    :type seed: int or None, (default = None)
+
+    :param weight:
+        If True then all shortest paths will be computed
+        as a sum of weights of all traversed edges.
+        Else shortest paths will be sum of jumps needed
+        from one node to every other.
+    :type weight: boolean, (default = True)
+
+    :param to_undirected: If True all edges will become undirected.
+    :type to_undirected: boolean, (default = False)
+
+    :param rel_error:
+        If given, pivots are added in batches of samples sources
+        until the half width of the confidence interval is at most
+        rel_error times the estimate, or every node is a pivot.
+    :type rel_error: float or None, (default = None)
+
+    :param confidence: Confidence level of the interval
+    :type confidence: float, (default = 0.95)
+
+    :return:
+        Estimate with its standard error, confidence interval
+        bounds and the number of pivots used. The estimate is
+        exact with zero error once every node is a pivot. With a
+        single pivot of a larger graph the error is unknown and
+        reported as infinity, and rel_error never stops the
+        sampling before a second pivot.
+    :rtype: EfficiencyEstimate
+
+    :raises ValueError: If samples is not positive
+
+    .. seealso::
+        :py:func:`global_efficiency`
+
+    Reference
+        .. [1] D. Eppstein and J. Wang,
+            "Fast Approximation of Centrality",
+            J. Graph Algorithms Appl., vol. 8, no. 1, 2004.
+    """
+    if samples < 1:
+        raise ValueError("Number of samples must be positive")
+
+    graph = as_compiled(graph, to_undirected is True)
+    n = graph.order()
+    if n < 2:
+        return EfficiencyEstimate(0, 0., 0, 0, n)
+
+    z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2.)
+    pivots = np.random.RandomState(seed).permutation(n)
+    source_sums = []
+
+    while True:
+        with instrumentation.phase('shortest_paths'):
+            source_sums.extend(_source_sums(
+                graph, pivots[len(source_sums):len(source_sums) + samples],
+                weight))
+        estimate = _sampled_efficiency(source_sums, n, z)
+
+        if rel_error is None or len(source_sums) == n:
+            return estimate
+        if len(source_sums) >= 2 and estimate.high - estimate.efficiency \
+                <= rel_error * estimate.efficiency:
+            return estimate
+
+
+@cached
 def local_efficiency(graph, weight=True, to_undirected=False):
     """
     Compute local efficiency for a given graph.
     Local efficiency is the average efficiency of
     the local subgraphs.
 
-    :param graph: NetworkX graph
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
 
     :param weight:
         If True then all shortest paths will be computed
@@ -98,17 +404,482 @@ def local_efficiency(graph, weight=True, to_undirected=False):
             Phys.Rev. Lett., vol. 87, no. 19, Oct. 2001.
     """
 
-    if to_undirected is True:
-        graph = graph.to_undirected()
+    graph = as_compiled(graph, to_undirected is True)
 
     sum_global_efficiency = 0
-    for node in graph:
-        neighbors = graph.neighbors(node)
-        subgraph = graph.subgraph(neighbors)
-        glob_efficiency = global_efficiency(subgraph, weight, to_undirected)
+    for glob_efficiency in _local_efficiencies(graph, weight is True):
         sum_global_efficiency += glob_efficiency
 
     efficiency = 1. / graph.order() * sum_global_efficiency
 
     return efficiency
 
+
+@cached
+def node_local_efficiency(graph, weight=True, to_undirected=False):
+    """
+    Compute local efficiency of each node, the global efficiency
+    of the subgraph induced by its neighbors.
+
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
+
+    :param weight:
+        If True then all shortest paths will be computed
+        as a sum of weights of all traversed edges.
+        Else shortest paths will be sum of jumps needed
+        from one node to every other.
+    :type weight: boolean, (default = True)
+
+    :param to_undirected: If True all edges will become undirected.
+    :type to_undirected: boolean, (default = False)
+
+    :return: Values of local efficiency for each node
+    :rtype: dictionary
+
+    .. seealso::
+        :py:func:`local_efficiency`
+    """
+    graph = as_compiled(graph, to_undirected is True)
+    return dict(zip(graph.nodes, _local_efficiencies(graph, weight is True)))
+
+
+class EfficiencyTracker(object):
+    """
+    Keep global efficiency up to date under edge events.
+
+    The tracker stores the shortest path lengths from every source
+    and their sums of 1/d_ij. Inserting an edge u->v or lowering its
+    weight only affects sources s with d(s,u) + w < d(s,v), whose
+    lengths are lowered by a search started at v that stops at nodes
+    that do not improve. Deleting an edge or raising its weight only
+    affects sources whose shortest paths may use it, those with
+    d(s,u) + w = d(s,v), and only these are searched again.
+
+    Per-source sums are formed like those of
+    :py:func:`global_efficiency`, so results equal a fresh call on
+    the same graph with the nodes in the order they were added.
+    The lengths of all reachable pairs are kept in memory.
+
+    :param graph: Initial NetworkX graph or CompiledGraph, optional
+
+    :param weight:
+        If True path lengths are sums of edge weights, else
+        numbers of hops.
+    :type weight: boolean, (default = True)
+
+    :param directed:
+        Whether edges are directed, ignored when graph is given.
+    :type directed: boolean, (default = True)
+
+    .. seealso::
+        :py:func:`global_efficiency`
+    """
+
+    def __init__(self, graph=None, weight=True, directed=True):
+        self.weight = weight is True
+        self._nodes = []
+        self._index = {}
+        self._succ = []
+        self._dist = []
+        self._sums = []
+
+        if graph is None:
+            self.directed = directed
+            return
+
+        graph = as_compiled(graph)
+        self.directed = graph.is_directed()
+        self._nodes = list(graph.nodes)
+        self._index = dict((node, i) for i, node in enumerate(self._nodes))
+        indptr = graph.out_indptr.tolist()
+        indices = graph.out_indices.tolist()
+        weights = graph.out_weights.tolist()
+        self._succ = [dict(zip(indices[indptr[i]:indptr[i + 1]],
+                               weights[indptr[i]:indptr[i + 1]]))
+                      for i in range(graph.order())]
+
+        with instrumentation.phase('shortest_paths'):
+            for reached, lengths in shortest_path_lengths(
+                    graph, range(graph.order()), self.weight):
+                row = dict(zip(reached, lengths))
+                self._dist.append(row)
+                self._sums.append(self._source_sum(row))
+
+    def add_node(self, node):
+        """Add a node without edges."""
+        if node not in self._index:
+            self._index[node] = len(self._nodes)
+            self._nodes.append(node)
+            self._succ.append({})
+            self._dist.append({len(self._dist): 0})
+            self._sums.append(0)
+
+    def add_edge(self, u, v, weight=1):
+        """
+        Insert edge u-v, or change its weight if it exists.
+
+        :param u: Source node
+        :param v: Target node
+        :param weight: Non-negative edge weight
+        """
+        self.add_node(u)
+        self.add_node(v)
+        arcs = self._arcs(u, v)
+        i, j = arcs[0]
+        old = self._succ[i].get(j)
+
+        if old is not None and self._cost(weight) > self._cost(old):
+            self._lengthen(arcs, weight)
+            return
+        for i, j in arcs:
+            self._succ[i][j] = weight
+            self._shorten(i, j)
+
+    def remove_edge(self, u, v):
+        """
+        Delete edge u-v.
+
+        :raises NetworkXError: If the edge does not exist
+        """
+        if u not in self._index or v not in self._index or \
+                self._index[v] not in self._succ[self._index[u]]:
+            raise nx.NetworkXError(
+                "The edge %s-%s is not in the graph." % (u, v))
+        self._lengthen(self._arcs(u, v), None)
+
+    def global_efficiency(self):
+        """Global efficiency of the current graph."""
+        n = len(self._nodes)
+        sum_dij = 0
+        for source_sum in self._sums:
+            sum_dij += source_sum
+
+        try:
+            efficiency = 1. / (n * (n - 1)) * sum_dij
+        except ZeroDivisionError:
+            efficiency = 0
+
+        return efficiency
+
+    def nodal_efficiency(self, node=None):
+        """
+        Nodal efficiency of node, or a dictionary of all of them.
+
+        .. seealso::
+            :py:func:`nodal_efficiency`
+        """
+        n = len(self._nodes)
+        if node is not None:
+            return self._sums[self._index[node]] / (n - 1) if n > 1 else 0
+        if n < 2:
+            return dict((node, 0) for node in self._nodes)
+        return dict((node, source_sum / (n - 1))
+                    for node, source_sum in zip(self._nodes, self._sums))
+
+    def _arcs(self, u, v):
+        i, j = self._index[u], self._index[v]
+        if self.directed or i == j:
+            return [(i, j)]
+        return [(i, j), (j, i)]
+
+    def _cost(self, weight):
+        return weight if self.weight else 1
+
+    def _shorten(self, i, j):
+        # Lower the lengths of every source that now reaches j faster.
+        cost = self._cost(self._succ[i][j])
+        for source, row in enumerate(self._dist):
+            if i not in row or (j in row and row[i] + cost >= row[j]):
+                continue
+            row[j] = row[i] + cost
+            heap = [(row[j], j)]
+            while heap:
+                d, x = heapq.heappop(heap)
+                if d > row[x]:
+                    continue
+                for y, weight in self._succ[x].items():
+                    d_y = d + self._cost(weight)
+                    if y not in row or d_y < row[y]:
+                        row[y] = d_y
+                        heapq.heappush(heap, (d_y, y))
+            self._sums[source] = self._source_sum(row)
+
+    def _lengthen(self, arcs, weight):
+        # Search again from every source with a shortest path through
+        # one of the arcs. Weight None deletes the arcs.
+        affected = [source for source, row in enumerate(self._dist)
+                    if any(i in row and j in row and
+                           row[i] + self._cost(self._succ[i][j]) == row[j]
+                           for i, j in arcs)]
+        for i, j in arcs:
+            if weight is None:
+                del self._succ[i][j]
+            else:
+                self._succ[i][j] = weight
+
+        for source in affected:
+            row = self._search(source)
+            self._dist[source] = row
+            self._sums[source] = self._source_sum(row)
+
+    def _search(self, source):
+        row = {source: 0}
+        heap = [(0, source)]
+        while heap:
+            d, x = heapq.heappop(heap)
+            if d > row[x]:
+                continue
+            for y, weight in self._succ[x].items():
+                d_y = d + self._cost(weight)
+                if y not in row or d_y < row[y]:
+                    row[y] = d_y
+                    heapq.heappush(heap, (d_y, y))
+        return row
+
+    def _source_sum(self, row):
+        # Shortest path searches settle nodes by increasing length and
+        # equal lengths add equal terms, so summing the sorted lengths
+        # reproduces the float sum of a search. Hop counts are summed
+        # per level like bfs_inverse_sums does.
+        if self.weight:
+            return sum(1. / d_ij for d_ij in sorted(row.values())
+                       if d_ij != 0)
+        source_sum = 0.
+        for level, count in sorted(collections.Counter(
+                row.values()).items()):
+            if level:
+                source_sum += count / float(level)
+        return source_sum
+
+
+###############################################################################
+#                           HELPER FUNCTIONS
+###############################################################################
+
+
+def _local_efficiencies(graph, weight):
+    # Neighborhoods are never built as graphs. The neighbors of a node
+    # get local indices in the position marker, the edges between them
+    # are copied into small list CSR buffers and every neighbor runs a
+    # search over those buffers only. Scratch lists are reused.
+    #
+    # Weighted searches use the heap, the buckets of Dial's algorithm
+    # are sized for the whole graph and not for a neighborhood. Hop
+    # counts of larger neighborhoods come from the bit-parallel BFS.
+    profile = instrumentation.active()
+    search = search_function(graph, weight, 'heap')
+    indptr = graph.out_indptr.tolist()
+    indices = graph.out_indices.tolist()
+    weights = graph.out_weights.tolist()
+    position = [-1] * graph.order()
+    dist = []
+
+    for node in range(graph.order()):
+        members = sorted(set(indices[indptr[node]:indptr[node + 1]]))
+        k = len(members)
+        if k < 2:
+            yield 0
+            continue
+
+        if profile is not None:
+            start = time.perf_counter()
+        for local, u in enumerate(members):
+            position[u] = local
+        local_indptr = [0]
+        local_indices = []
+        local_weights = []
+        for u in members:
+            for e in range(indptr[u], indptr[u + 1]):
+                v = position[indices[e]]
+                if v >= 0:
+                    local_indices.append(v)
+                    local_weights.append(weights[e])
+            local_indptr.append(len(local_indices))
+        for u in members:
+            position[u] = -1
+
+        if profile is not None:
+            built = time.perf_counter()
+            profile.add_time('local_neighborhoods', built - start)
+            profile.count('subgraphs_built')
+            visited = 0
+        if not weight and k >= _LOCAL_BFS_MIN:
+            sum_dij = 0
+            local = CompiledGraph(range(k), local_indptr, local_indices,
+                                  local_weights)
+            for source_sum in bfs_inverse_sums(local, range(k)):
+                sum_dij += source_sum
+            if profile is not None:
+                profile.add_time('local_searches',
+                                 time.perf_counter() - built)
+            yield 1. / (k * (k - 1)) * sum_dij
+            continue
+
+        if len(dist) < k:
+            dist.extend([None] * (k - len(dist)))
+        sum_dij = 0
+        for source in range(k):
+            reached = search(local_indptr, local_indices, local_weights,
+                             source, dist)
+            sum_dij += sum(1. / dist[v] for v in reached if dist[v] != 0)
+            for v in reached:
+                dist[v] = None
+            if profile is not None:
+                visited += len(reached)
+
+        if profile is not None:
+            profile.add_time('local_searches', time.perf_counter() - built)
+            profile.count('nodes_visited', visited)
+            profile.count('edges_relaxed', k * len(local_indices))
+
+        yield 1. / (k * (k - 1)) * sum_dij
+
+
+def _distance_store(graph, weight, n_jobs, engine, distances):
+    if distances is None:
+        return None
+    if isinstance(distances, DistanceStore):
+        distances.check(graph, weight)
+        return distances
+    return DistanceStore.build(graph, distances, weight, n_jobs=n_jobs,
+                               engine=engine)
+
+
+def _vulnerability_sums(graph, start, stop, removed, weight, engine, path):
+    # One vector per block of sources holding, for every removed node
+    # k, the sum over the sources of sum_j 1/d_ij without k, followed
+    # by the sum with all nodes present.
+    n = graph.order()
+    store = DistanceStore(path) if path is not None else None
+    search = search_function(graph, weight, engine)
+    indptr = graph.out_indptr.tolist()
+    indices = graph.out_indices.tolist()
+    weights = graph.out_weights.tolist()
+    dist = [None] * n
+
+    src = _row_sources(graph.out_indptr)
+    dst = graph.out_indices.astype(np.int64)
+    cost = graph.out_weights.astype(np.float64) if weight else \
+        np.ones(len(dst))
+    exact = store is None or store.matrix.dtype.kind in 'iu'
+    # Without zero length edges the predecessor relation is acyclic,
+    # which the only predecessor test relies on.
+    sole = exact and (len(cost) == 0 or cost.min() > 0)
+    profile = instrumentation.active()
+
+    partials = []
+    for block in range(start, stop):
+        totals = np.zeros(len(removed) + 1)
+        searches = collections.defaultdict(list)
+
+        for source in range(block * _VULNERABILITY_BLOCK,
+                            min(n, (block + 1) * _VULNERABILITY_BLOCK)):
+            if store is None:
+                reached = search(indptr, indices, weights, source, dist)
+                row = np.full(n, np.inf)
+                row[reached] = [dist[u] for u in reached]
+                sum_dij = sum(1. / dist[u] for u in reached if dist[u] != 0)
+                for u in reached:
+                    dist[u] = None
+                if profile is not None:
+                    profile.count('nodes_visited', len(reached))
+            else:
+                row = store.rows(source, source + 1)[0]
+                sum_dij = float(store.inverse_sums[source])
+
+            inverse = np.zeros(n)
+            finite = np.isfinite(row) & (row != 0)
+            inverse[finite] = 1. / row[finite]
+            values = sum_dij - inverse[removed]
+            values[removed == source] = 0
+
+            on_paths = _path_predecessors(row, src, dst, cost, exact, sole)
+            for r in np.flatnonzero(on_paths[removed] &
+                                    (removed != source)).tolist():
+                values[r] = 0
+                searches[r].append(source)
+
+            totals[:-1] += values
+            totals[-1] += sum_dij
+
+        # Search again without k from the sources it lies on paths of.
+        # Hop counts use the bit-parallel BFS over all of them at once.
+        for r, sources in searches.items():
+            k = int(removed[r])
+            if not weight:
+                for sum_dij in bfs_inverse_sums(graph, sources, blocked=k):
+                    totals[r] += sum_dij
+                continue
+            dist[k] = -1
+            for source in sources:
+                reached = search(indptr, indices, weights, source, dist)
+                totals[r] += sum(1. / dist[u] for u in reached
+                                 if dist[u] != 0)
+                for u in reached:
+                    dist[u] = None
+                if profile is not None:
+                    profile.count('nodes_visited', len(reached))
+            dist[k] = None
+
+        partials.append(totals)
+
+    return partials
+
+
+def _path_predecessors(row, src, dst, cost, exact, sole):
+    # Mark nodes whose removal may change the lengths in row: those
+    # that are a shortest path predecessor of another node, or with
+    # sole, the only one. Rounded rows compare with a tolerance and
+    # mark every predecessor.
+    through = row[src] + cost
+    if exact:
+        tight = through == row[dst]
+    else:
+        tight = np.isclose(through, row[dst], rtol=1e-6, atol=0)
+    tight &= np.isfinite(through) & (src != dst)
+
+    marks = np.zeros(len(row), dtype=bool)
+    if sole:
+        counts = np.bincount(dst[tight], minlength=len(row))
+        tight &= counts[dst] == 1
+    marks[src[tight]] = True
+    return marks
+
+
+def _sampled_efficiency(source_sums, n, z):
+    k = len(source_sums)
+    efficiency = float(np.mean(source_sums)) / (n - 1)
+    if k == n:
+        stderr = 0.
+    elif k < 2:
+        # One pivot tells nothing about the spread of the source sums.
+        stderr = float('inf')
+    else:
+        # Sampling without replacement, hence the finite population factor.
+        stderr = float(np.std(source_sums, ddof=1)) / (n - 1) * \
+            math.sqrt((1. - float(k) / n) / k)
+
+    return EfficiencyEstimate(efficiency, stderr, efficiency - z * stderr,
+                              efficiency + z * stderr, k)
+
+
+def _inverse_sums(graph, weight, n_jobs, engine, checkpoint):
+    # sum_j 1/d_ij of every source i, in source order.
+    args = (weight is True, engine)
+    if checkpoint is None:
+        return map_sources(_inverse_distance_sums, graph, graph.order(),
+                           n_jobs, args)
+    key = checkpoint_key('DiNetX.efficiency._inverse_sums', graph,
+                         weight=weight is True)
+    return checkpointed_map(_inverse_distance_sums, graph, graph.order(),
+                            n_jobs, args, checkpoint, key)
+
+
+def _inverse_distance_sums(graph, start, stop, weight, engine):
+    return _source_sums(graph, range(start, stop), weight, engine)
+
+
+def _source_sums(graph, sources, weight, engine='auto'):
+    if not weight:
+        return bfs_inverse_sums(graph, sources)
+    return dijkstra_inverse_sums(graph, sources, engine)
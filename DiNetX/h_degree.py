@@ -3,9 +3,22 @@
 
 __author__ = 'Tanja Miličić'
 
+import math
+
 import networkx as nx
+import numpy as np
+
+from DiNetX import instrumentation
+from DiNetX.cache import cached
+from DiNetX.compiled import as_compiled, _records
+
+
+# Number of CSR rows whose h-degrees are computed at once by the
+# iter_* variants.
+_BLOCK_ROWS = 1 << 16
 
 
+@cached
 def h_degree(graph):
     """
     H-degree of a node is equal to n if this node has
@@ -15,7 +28,7 @@ def h_degree(graph):
     For example if node A has degree 4 and weight of
     edges 1,3,3,5 then it's h-degree will be 3.
 
-    :param graph: NetworkX graph
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
 
     :return: Values of h-degree for each node
 
@@ -30,16 +43,11 @@ def h_degree(graph):
             Journal of Informetrics 5.4 (2011): 668-677.
     """
 
-    h_degree_dict = {}
-    for node in graph.nodes_iter():
-        weights = [w.get('weight') for u, c, w
-                   in graph.edges(node, data=True)]
-
-        h_degree_dict[node] = _find_h_degree(weights)
-
-    return h_degree_dict
+    graph = as_compiled(graph)
+    return _h_degree_dict(graph, graph.out_indptr, graph.out_weights)
 
 
+@cached
 def in_h_degree(graph):
     """
     In-h-degree of a node is equal to n if this node has
@@ -49,7 +57,7 @@ def in_h_degree(graph):
     For example if node A has degree 5 and weight of
     edges 5,3,3,1,1 then it's in-h-degree will be 3.
 
-    :param graph: NetworkX graph
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
 
     :return: Values of in-h-degree for each node
 
@@ -64,20 +72,15 @@ def in_h_degree(graph):
             Journal of Informetrics 5.4 (2011): 668-677.
     """
 
+    graph = as_compiled(graph)
     if not graph.is_directed():
         raise nx.NetworkXError(
             "in_h_degree() not defined for undirected graphs.")
 
-    h_degree_dict = {}
-    for node in graph.nodes_iter():
-        in_weights = [w.get('weight') for u, c, w
-                      in graph.in_edges(node, data=True)]
-
-        h_degree_dict[node] = _find_h_degree(in_weights)
-
-    return h_degree_dict
+    return _h_degree_dict(graph, graph.in_indptr, graph.in_weights)
 
 
+@cached
 def out_h_degree(graph):
     """
     Out-h-degree of a node is equal to n if this node has
@@ -87,7 +90,7 @@ def out_h_degree(graph):
     For example if node A has out-degree 3 and weight of
     edges 3,3,2 then it's out-h-degree will be 2.
 
-    :param graph: NetworkX graph
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
 
     :return: Values of out-h-degree for each node
 
@@ -102,32 +105,288 @@ def out_h_degree(graph):
             Journal of Informetrics 5.4 (2011): 668-677.
     """
 
+    graph = as_compiled(graph)
     if not graph.is_directed():
         raise nx.NetworkXError(
             "out_h_degree() not defined for undirected graphs.")
 
-    h_degree_dict = {}
-    for node in graph.nodes_iter():
-        out_weights = [w.get('weight') for u, c, w
-                       in graph.out_edges(node, data=True)]
+    return _h_degree_dict(graph, graph.out_indptr, graph.out_weights)
 
-        h_degree_dict[node] = _find_h_degree(out_weights)
 
-    return h_degree_dict
+def iter_h_degree(graph, chunk_size=None):
+    """
+    Generate h-degrees of all nodes in node order.
+
+    Values are computed for blocks of rows while the generator is
+    consumed, so the first records are available early and memory
+    does not grow with the number of nodes.
+
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
+
+    :param chunk_size:
+        If given, lists of chunk_size records are yielded instead
+        of single records, the last one may be shorter.
+    :type chunk_size: int or None, (default = None)
 
+    :return: (node, h-degree) records, or lists of them
 
-def _find_h_degree(weights):
-    i = 1
-    best_h_degree = 1
-    while True:
-        tmp = len([x for x in weights if x >= i])
-        if i < tmp:
-            best_h_degree = i
-        elif i == tmp:
-            best_h_degree = tmp
-        else:
-            break
-        i += 1
+    :rtype: generator
 
-    return best_h_degree
+    :raises ValueError: If chunk_size is not positive
+
+    .. seealso::
+        :py:func:`h_degree`
+    """
+
+    graph = as_compiled(graph)
+    return _records(graph.nodes, _h_degree_blocks(
+        graph.out_indptr, graph.out_weights), chunk_size)
+
+
+def iter_in_h_degree(graph, chunk_size=None):
+    """
+    Generate in-h-degrees of all nodes in node order.
+
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
+
+    :param chunk_size: Number of records per yielded list, or None
+    :type chunk_size: int or None, (default = None)
+
+    :return: (node, in-h-degree) records, or lists of them
+
+    :rtype: generator
+
+    :raises NetworkXError: If graph is undirected
+
+    .. seealso::
+        :py:func:`in_h_degree`, :py:func:`iter_h_degree`
+    """
+
+    graph = as_compiled(graph)
+    if not graph.is_directed():
+        raise nx.NetworkXError(
+            "in_h_degree() not defined for undirected graphs.")
+
+    return _records(graph.nodes, _h_degree_blocks(
+        graph.in_indptr, graph.in_weights), chunk_size)
+
+
+def iter_out_h_degree(graph, chunk_size=None):
+    """
+    Generate out-h-degrees of all nodes in node order.
+
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
+
+    :param chunk_size: Number of records per yielded list, or None
+    :type chunk_size: int or None, (default = None)
+
+    :return: (node, out-h-degree) records, or lists of them
+
+    :rtype: generator
+
+    :raises NetworkXError: If graph is undirected
+
+    .. seealso::
+        :py:func:`out_h_degree`, :py:func:`iter_h_degree`
+    """
+
+    graph = as_compiled(graph)
+    if not graph.is_directed():
+        raise nx.NetworkXError(
+            "out_h_degree() not defined for undirected graphs.")
+
+    return _records(graph.nodes, _h_degree_blocks(
+        graph.out_indptr, graph.out_weights), chunk_size)
+
+
+class HDegreeTracker(object):
+    """
+    Keep h-degrees of all nodes up to date under edge events.
+
+    Every node stores how many of its edges have each integer part
+    of the weight, its current h and the number of edges with weight
+    at least h. Inserting or deleting an edge moves h by at most one,
+    so each event costs O(1) dictionary operations per endpoint and
+    queries read the stored values.
+
+    Values follow :py:func:`h_degree`, :py:func:`in_h_degree` and
+    :py:func:`out_h_degree`, so for directed graphs the h-degree
+    is taken over outgoing edges.
+
+    :param graph: Initial NetworkX graph or CompiledGraph, optional
+    :param directed:
+        Whether edges are directed, ignored when graph is given.
+    :type directed: boolean, (default = True)
+
+    .. seealso::
+        :py:func:`h_degree`
+    """
 
+    def __init__(self, graph=None, directed=True):
+        self._weights = {}
+        self._out = {}
+        self._in = {}
+
+        if graph is None:
+            self.directed = directed
+            return
+
+        graph = as_compiled(graph)
+        self.directed = graph.is_directed()
+        for node in graph.nodes:
+            self.add_node(node)
+        sources = np.repeat(np.arange(graph.order()),
+                            np.diff(graph.out_indptr)).tolist()
+        for u, v, weight in zip(sources, graph.out_indices.tolist(),
+                                graph.out_weights.tolist()):
+            if self.directed or u <= v:
+                self.add_edge(graph.nodes[u], graph.nodes[v], weight)
+
+    def add_node(self, node):
+        """Add a node without edges, its h-degree is 1."""
+        if node not in self._out:
+            self._out[node] = _HIndex()
+            if self.directed:
+                self._in[node] = _HIndex()
+
+    def add_edge(self, u, v, weight=1):
+        """
+        Insert edge u-v, or change its weight if it exists.
+
+        :param u: Source node
+        :param v: Target node
+        :param weight: Edge weight
+        """
+        if (u, v) in self._weights:
+            self.remove_edge(u, v)
+        self.add_node(u)
+        self.add_node(v)
+
+        self._weights[u, v] = weight
+        self._out[u].insert(weight)
+        if self.directed:
+            self._in[v].insert(weight)
+        elif u != v:
+            self._weights[v, u] = weight
+            self._out[v].insert(weight)
+
+    def remove_edge(self, u, v):
+        """
+        Delete edge u-v.
+
+        :raises NetworkXError: If the edge does not exist
+        """
+        try:
+            weight = self._weights.pop((u, v))
+        except KeyError:
+            raise nx.NetworkXError(
+                "The edge %s-%s is not in the graph." % (u, v))
+
+        self._out[u].remove(weight)
+        if self.directed:
+            self._in[v].remove(weight)
+        elif u != v:
+            del self._weights[v, u]
+            self._out[v].remove(weight)
+
+    def h_degree(self, node=None):
+        """
+        H-degree of node, or a dictionary of all h-degrees.
+
+        .. seealso::
+            :py:func:`h_degree`
+        """
+        return _h_query(self._out, node)
+
+    def in_h_degree(self, node=None):
+        """
+        In-h-degree of node, or a dictionary of all in-h-degrees.
+
+        :raises NetworkXError: If edges are undirected
+        """
+        if not self.directed:
+            raise nx.NetworkXError(
+                "in_h_degree() not defined for undirected graphs.")
+        return _h_query(self._in, node)
+
+    def out_h_degree(self, node=None):
+        """
+        Out-h-degree of node, or a dictionary of all out-h-degrees.
+
+        :raises NetworkXError: If edges are undirected
+        """
+        if not self.directed:
+            raise nx.NetworkXError(
+                "out_h_degree() not defined for undirected graphs.")
+        return _h_query(self._out, node)
+
+
+class _HIndex(object):
+    # h is the largest i with at least i weights >= i (0 if none) and
+    # at_least_h the number of weights >= h. Weights only matter through
+    # their integer part, counted per value in counts.
+    __slots__ = ('h', 'at_least_h', 'counts')
+
+    def __init__(self):
+        self.h = 0
+        self.at_least_h = 0
+        self.counts = {}
+
+    def insert(self, weight):
+        key = int(math.floor(weight))
+        self.counts[key] = self.counts.get(key, 0) + 1
+        if key >= self.h:
+            self.at_least_h += 1
+            above = self.at_least_h - self.counts.get(self.h, 0)
+            if above >= self.h + 1:
+                self.h += 1
+                self.at_least_h = above
+
+    def remove(self, weight):
+        key = int(math.floor(weight))
+        self.counts[key] -= 1
+        if not self.counts[key]:
+            del self.counts[key]
+        if key >= self.h:
+            self.at_least_h -= 1
+            if self.h > 0 and self.at_least_h < self.h:
+                self.h -= 1
+                self.at_least_h += self.counts.get(self.h, 0)
+
+    def value(self):
+        return max(self.h, 1)
+
+
+def _h_query(h_indices, node):
+    if node is None:
+        return dict((n, h_index.value()) for n, h_index in h_indices.items())
+    return h_indices[node].value()
+
+
+def _h_degree_dict(graph, indptr, weights):
+    with instrumentation.phase('h_degree'):
+        return dict(zip(graph.nodes, _h_degrees(indptr, weights).tolist()))
+
+
+def _h_degree_blocks(indptr, weights, rows=_BLOCK_ROWS):
+    # Yield (start, h-degrees) for consecutive blocks of rows.
+    n = len(indptr) - 1
+    for start in range(0, n, rows):
+        block = indptr[start:min(start + rows, n) + 1]
+        with instrumentation.phase('h_degree'):
+            values = _h_degrees(block - block[0],
+                                weights[block[0]:block[-1]]).tolist()
+        yield start, values
+
+
+def _h_degrees(indptr, weights):
+    # Sort every CSR row by decreasing weight. The r-th largest weight
+    # of a row is >= r exactly for the first h positions, so counting
+    # those positions per row gives the h-degree of all nodes at once.
+    # A node without such a position has h-degree 1.
+    degrees = np.diff(indptr)
+    rows = np.repeat(np.arange(len(degrees)), degrees)
+    order = np.lexsort((-weights, rows))
+    rank = np.arange(1, len(weights) + 1) - np.repeat(indptr[:-1], degrees)
+    h = np.bincount(rows[weights[order] >= rank], minlength=len(degrees))
+    return np.maximum(h, 1)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import collections
+import contextlib
+import time
+
+
+_active = None
+
+
+class Profile(object):
+    """
+    Phase timings and operation counters collected by :py:func:`profile`.
+
+    :ivar timings: Seconds spent in each phase, keyed by phase name
+    :ivar counters: Totals of each counter, keyed by counter name
+    :ivar levels:
+        Per-level totals, keyed by name, where item j - 1 of a list
+        belongs to level j. Accessibility reports the number of
+        frontier nodes of each step under 'frontier_nodes'.
+
+    Counters reported by the metric kernels are 'edges_relaxed',
+    'nodes_visited' and 'subgraphs_built', the phases include
+    'compile', 'shortest_paths', 'local_neighborhoods',
+    'local_searches', 'accessibility', 'h_degree' and
+    'degree_centrality'.
+    """
+
+    def __init__(self, callback=None):
+        self.timings = collections.defaultdict(float)
+        self.counters = collections.defaultdict(int)
+        self.levels = collections.defaultdict(list)
+        self.callback = callback
+
+    def count(self, name, value=1):
+        """Add value to counter name."""
+        self.counters[name] += value
+        if self.callback is not None:
+            self.callback('count', name, value)
+
+    def add_level(self, name, level, value):
+        """Add value to the total of name at level (starting at 1)."""
+        totals = self.levels[name]
+        if len(totals) < level:
+            totals.extend([0] * (level - len(totals)))
+        totals[level - 1] += value
+        if self.callback is not None:
+            self.callback('level', (name, level), value)
+
+    def add_time(self, name, seconds):
+        """Add seconds to the time of phase name."""
+        self.timings[name] += seconds
+        if self.callback is not None:
+            self.callback('time', name, seconds)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Context manager timing its body as phase name."""
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def __repr__(self):
+        return 'Profile(timings=%r, counters=%r, levels=%r)' % (
+            dict(self.timings), dict(self.counters), dict(self.levels))
+
+
+@contextlib.contextmanager
+def profile(callback=None):
+    """
+    Collect timings and counters of all metric calls in the body.
+
+    With no profile active, kernels only test a module variable, so
+    the hooks cost next to nothing. Work done in worker processes
+    (n_jobs > 1) is timed as a whole but its counters are not
+    collected.
+
+    Example::
+
+        with profile() as p:
+            global_efficiency(graph)
+        p.timings['shortest_paths'], p.counters['edges_relaxed']
+
+    :param callback:
+        Optional function called as callback(kind, name, value) on
+        every update, where kind is 'time', 'count' or 'level'.
+    :return: Context manager yielding the Profile
+    """
+    global _active
+    previous = _active
+    _active = Profile(callback)
+    try:
+        yield _active
+    finally:
+        _active = previous
+
+
+def active():
+    """The Profile being collected, or None when profiling is off."""
+    return _active
+
+
+def phase(name):
+    """
+    Context manager timing its body as phase name of the active
+    profile, or doing nothing if profiling is off.
+    """
+    if _active is None:
+        return _NULL_PHASE
+    return _active.phase(name)
+
+
+class _NullPhase(object):
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
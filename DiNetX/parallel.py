@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from DiNetX import snapshot
+from DiNetX.compiled import CompiledGraph
+
+
+_ARRAYS = ('out_indptr', 'out_indices', 'out_weights',
+           'in_indptr', 'in_indices', 'in_weights')
+
+# Graph attached in a worker process by _init_worker.
+_worker_graph = None
+_worker_blocks = []
+
+
+def effective_n_jobs(n_jobs):
+    """
+    Number of worker processes for a given n_jobs value.
+
+    :param n_jobs:
+        Number of processes. None or 1 means serial execution
+        and negative values count back from the number of CPUs,
+        so -1 uses all of them.
+    :return: Number of processes, at least 1
+    :rtype: int
+    """
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        n_jobs = multiprocessing.cpu_count() + 1 + n_jobs
+    return max(1, int(n_jobs))
+
+
+def map_sources(func, graph, n_sources, n_jobs, args=(), chunks_per_job=4):
+    """
+    Evaluate func over contiguous ranges of source indices in a
+    process pool and return the concatenated results in source order.
+
+    The graph arrays are copied once into shared memory and every
+    worker maps them instead of receiving its own pickled copy. A
+    graph loaded from a snapshot with memory mapping is not copied,
+    the workers map the snapshot files instead.
+
+    :param func:
+        Module level function called as func(graph, start, stop, *args)
+        that returns a sequence with one entry per source in
+        range(start, stop).
+    :param graph: CompiledGraph
+    :param n_sources: Number of sources, range(n_sources) is partitioned
+    :param n_jobs: Number of processes, see :py:func:`effective_n_jobs`
+    :param args: Extra positional arguments passed to func
+    :param chunks_per_job: Number of ranges per process, for load balance
+    :return: One result per source
+    :rtype: list
+    """
+    n_jobs = effective_n_jobs(n_jobs)
+    if n_jobs == 1 or n_sources < 2:
+        return list(func(graph, 0, n_sources, *args))
+
+    bounds = np.linspace(0, n_sources, min(n_sources, n_jobs * chunks_per_job)
+                         + 1).astype(np.int64).tolist()
+    tasks = [(func, start, stop, args)
+             for start, stop in zip(bounds[:-1], bounds[1:]) if start < stop]
+
+    blocks = []
+    try:
+        pool = _pool(graph, n_jobs, blocks)
+        try:
+            parts = pool.map(_run_task, tasks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    finally:
+        _release(blocks)
+
+    return [value for part in parts for value in part]
+
+
+def imap_sources(func, graph, start, stop, n_jobs, args=(), block_size=1024):
+    """
+    Evaluate func over consecutive ranges of block_size source
+    indices from start to stop and yield the results of every range
+    in source order, as soon as it and all ranges before it are done.
+
+    :param func: Module level function, see :py:func:`map_sources`
+    :param graph: CompiledGraph
+    :param start: First source index
+    :param stop: Source index after the last one
+    :param n_jobs: Number of processes, see :py:func:`effective_n_jobs`
+    :param args: Extra positional arguments passed to func
+    :param block_size: Number of sources per range
+    :return: Tuples (range start, range stop, results of the range)
+    :rtype: generator
+    """
+    bounds = list(range(start, stop, block_size)) + [stop]
+    ranges = [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if a < b]
+    n_jobs = effective_n_jobs(n_jobs)
+    if n_jobs == 1 or len(ranges) < 2:
+        for a, b in ranges:
+            yield a, b, list(func(graph, a, b, *args))
+        return
+
+    blocks = []
+    try:
+        pool = _pool(graph, n_jobs, blocks)
+        try:
+            parts = pool.imap(_run_task, [(func, a, b, args)
+                                          for a, b in ranges])
+            for (a, b), part in zip(ranges, parts):
+                yield a, b, part
+            pool.close()
+        finally:
+            # Stops the remaining tasks if the consumer gave up early.
+            pool.terminate()
+            pool.join()
+    finally:
+        _release(blocks)
+
+
+###############################################################################
+#                           HELPER FUNCTIONS
+###############################################################################
+
+
+def _pool(graph, n_jobs, blocks):
+    spec = getattr(graph, '_snapshot', None) or _share(graph, blocks)
+    return multiprocessing.Pool(n_jobs, initializer=_init_worker,
+                                initargs=(spec,))
+
+
+def _release(blocks):
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+
+def _share(graph, blocks):
+    arrays = {}
+    for name in _ARRAYS:
+        array = getattr(graph, name)
+        block = shared_memory.SharedMemory(create=True,
+                                           size=max(1, array.nbytes))
+        blocks.append(block)
+        np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+        arrays[name] = (block.name, array.shape, array.dtype.str)
+    return graph.order(), graph.is_directed(), arrays
+
+
+def _init_worker(spec):
+    global _worker_graph
+    if isinstance(spec, str):
+        _worker_graph = snapshot._open(spec)[0]
+        return
+
+    n, directed, arrays = spec
+    views = {}
+    for name, (block_name, shape, dtype) in arrays.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _worker_blocks.append(block)
+        views[name] = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+    _worker_graph = CompiledGraph._from_arrays(range(n), directed, **views)
+
+
+def _run_task(task):
+    func, start, stop, args = task
+    return list(func(_worker_graph, start, stop, *args))
@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import heapq
+
+import numpy as np
+
+from DiNetX import instrumentation
+
+
+# Sources handled by one sweep of the bit-parallel BFS are
+# 64 * _BFS_WORDS, one bit of a uint64 word per source.
+_BFS_WORDS = 4
+
+# Sources of the searches that estimate the work of each engine.
+_PROBES = 4
+
+
+def select_engine(graph, engine='auto'):
+    """
+    Choose the weighted shortest path engine for graph.
+
+    'dial' is a bucket queue (Dial's algorithm) for non-negative
+    integer weights, 'heap' is a binary heap over a flat list for
+    any non-negative weights. A search of Dial's algorithm steps
+    through every distance value up to the farthest node, while the
+    heap pays a push and a pop per relaxed edge. 'auto' runs heap
+    searches from a few evenly spaced nodes and picks 'dial' when
+    their farthest distances add up to at most the number of edges
+    they relaxed, where the steps cost less than the heap
+    operations, and 'heap' otherwise.
+
+    :param graph: CompiledGraph
+    :param engine: One of 'auto', 'dial' or 'heap'
+    :return: Name of the engine
+    :rtype: string
+
+    :raises ValueError: If engine is unknown or cannot handle the weights
+    """
+    weights = graph.out_weights
+    integral = weights.dtype.kind == 'i' and \
+        (len(weights) == 0 or weights.min() >= 0)
+
+    if engine == 'auto':
+        if not integral:
+            return 'heap'
+        if len(weights) == 0 or weights.max() <= 1:
+            return 'dial'
+        steps, relaxed = _probe_costs(graph)
+        return 'dial' if steps <= relaxed else 'heap'
+
+    if engine not in _ENGINES:
+        raise ValueError("Unknown shortest path engine %r" % engine)
+    if engine == 'dial' and not integral:
+        raise ValueError("Engine 'dial' requires non-negative integer weights")
+    return engine
+
+
+def search_function(graph, weight=True, engine='auto'):
+    """
+    Return the single source search run on Python list adjacency.
+
+    The search is called as
+    search(indptr, indices, weights, source, dist)
+    with CSR rows given as lists whose weights are at most those of
+    graph, and dist a list holding None at every node. It stores the
+    length of each reached node in dist and returns the reached
+    nodes in the order they were settled. Callers reset dist at
+    those nodes before the next search. Scratch space is allocated
+    once and reused by all searches of the returned function.
+
+    :param graph: CompiledGraph whose weights decide the engine
+    :param weight: If False the search is a BFS counting hops
+    :param engine: Engine name, see :py:func:`select_engine`
+    :return: Search function
+    """
+    if not weight:
+        return _bfs
+    engine = select_engine(graph, engine)
+    if engine == 'dial':
+        weights = graph.out_weights
+        return _dial_search(int(weights.max()) + 1 if len(weights) else 1)
+    return _heap
+
+
+def shortest_path_lengths(graph, sources, weight=True, engine='auto'):
+    """
+    Yield shortest path lengths from each source.
+
+    Distances live in arrays indexed by node that are allocated once
+    and reset only at the nodes reached by the previous source.
+
+    :param graph: CompiledGraph
+    :param sources: Sequence of source node indices
+    :param weight: If False lengths are numbers of hops
+    :param engine: Engine name, see :py:func:`select_engine`
+    :return:
+        Generator of (reached, lengths) list pairs, one per source,
+        holding the reached node indices in the order they were
+        settled and their distances.
+    """
+    run = search_function(graph, weight, engine)
+    # The search loops run in Python, where list indexing is much
+    # cheaper than indexing or slicing NumPy arrays.
+    indptr = graph.out_indptr.tolist()
+    indices = graph.out_indices.tolist()
+    weights = graph.out_weights.tolist()
+    dist = [None] * graph.order()
+    profile = instrumentation.active()
+
+    for source in sources:
+        reached = run(indptr, indices, weights, int(source), dist)
+        lengths = [dist[u] for u in reached]
+        for u in reached:
+            dist[u] = None
+        if profile is not None:
+            profile.count('nodes_visited', len(reached))
+            profile.count('edges_relaxed', sum(indptr[u + 1] - indptr[u]
+                                               for u in reached))
+        yield reached, lengths
+
+
+def dijkstra_inverse_sums(graph, sources, engine='auto'):
+    """
+    Yield sum_j 1/d_ij for each source i, where d_ij is the weighted
+    shortest path length and unreachable nodes are skipped.
+
+    :param graph: CompiledGraph
+    :param sources: Sequence of source node indices
+    :param engine: Engine name, see :py:func:`select_engine`
+    :return: Generator of per-source sums, in the order of sources
+    """
+    for reached, lengths in shortest_path_lengths(graph, sources, True,
+                                                  engine):
+        yield sum(1. / d_ij for d_ij in lengths if d_ij != 0)
+
+
+def bfs_inverse_sums(graph, sources, words=_BFS_WORDS, blocked=None):
+    """
+    Yield sum_j 1/d_ij for each source i, where d_ij is the number
+    of hops from i to j and unreachable nodes are skipped.
+
+    Sources are processed 64 * words at a time. Every node keeps one
+    bit per source of the batch for its visited set and its BFS
+    frontier, so one level of all searches is a single sweep over
+    the in-adjacency that ORs the frontier words of predecessors.
+    The number of newly reached nodes of every source is then taken
+    from the bits set on that level and contributes count / level.
+
+    A sweep costs about as much as visiting the edges once for each
+    source of a full batch in plain searches, so on graphs of large
+    diameter the sweeps are more expensive than per-source searches.
+    Once a batch takes more levels than it has sources, or than 64
+    for batches of one word, it and all later batches run a scalar
+    BFS per source instead.
+
+    :param graph: CompiledGraph
+    :param sources: Sequence of source node indices
+    :param words: Number of uint64 words per node and batch
+    :param blocked:
+        Index of a node treated as removed from the graph, it must
+        not be a source
+    :return: Generator of per-source sums, in the order of sources
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    n = graph.order()
+    indptr, indices = graph.in_indptr, graph.in_indices
+    rows = np.flatnonzero(np.diff(indptr))
+    starts = indptr[:-1][rows]
+    width = 64 * words
+    profile = instrumentation.active()
+
+    for offset in range(0, len(sources), width):
+        batch = sources[offset:offset + width]
+        bits = np.arange(len(batch))
+        visited = np.zeros((n, (len(batch) + 63) // 64), dtype=np.uint64)
+        np.bitwise_or.at(visited, (batch, bits // 64),
+                         np.left_shift(np.uint64(1),
+                                       (bits % 64).astype(np.uint64)))
+        frontier = visited.copy()
+        if blocked is not None:
+            # A node visited by every search is never reached again.
+            visited[blocked] = ~np.uint64(0)
+        sums = np.zeros(len(batch))
+
+        level = 0
+        while level < max(len(batch), 64):
+            level += 1
+            reached = np.zeros_like(visited)
+            if len(rows):
+                reached[rows] = np.bitwise_or.reduceat(frontier[indices],
+                                                       starts, axis=0)
+            frontier = reached & ~visited
+            active = np.flatnonzero(frontier.any(axis=1))
+            if len(active) == 0:
+                break
+
+            visited[active] |= frontier[active]
+            counts = _bit_counts(frontier[active])[:len(batch)]
+            sums += counts / float(level)
+            if profile is not None:
+                profile.count('nodes_visited', int(counts.sum()))
+                profile.count('edges_relaxed', len(indices))
+        else:
+            for source_sum in _scalar_bfs_sums(graph, sources[offset:],
+                                               blocked):
+                yield source_sum
+            return
+
+        for source_sum in sums.tolist():
+            yield source_sum
+
+
+###############################################################################
+#                           HELPER FUNCTIONS
+###############################################################################
+
+
+def _bit_counts(words):
+    # Number of rows with bit b set, for every bit position b.
+    octets = words.astype('<u8').view(np.uint8)
+    return np.unpackbits(octets, axis=1, bitorder='little').sum(axis=0)
+
+
+def _scalar_bfs_sums(graph, sources, blocked):
+    indptr = graph.out_indptr.tolist()
+    indices = graph.out_indices.tolist()
+    dist = [None] * graph.order()
+    if blocked is not None:
+        # Any value other than None keeps the node from being reached.
+        dist[blocked] = -1
+    profile = instrumentation.active()
+
+    for source in sources.tolist():
+        reached = _bfs(indptr, indices, None, source, dist)
+        yield sum(1. / dist[u] for u in reached if dist[u] != 0)
+        for u in reached:
+            dist[u] = None
+        if profile is not None:
+            profile.count('nodes_visited', len(reached))
+
+
+def _probe_costs(graph):
+    # Distance values a Dial search would step through and edges it
+    # would relax, summed over heap searches from _PROBES nodes.
+    indptr = graph.out_indptr.tolist()
+    indices = graph.out_indices.tolist()
+    weights = graph.out_weights.tolist()
+    dist = [None] * graph.order()
+    steps = relaxed = 0
+    for source in np.unique(np.linspace(0, graph.order() - 1,
+                                        _PROBES).astype(np.int64)).tolist():
+        reached = _heap(indptr, indices, weights, source, dist)
+        steps += dist[reached[-1]]
+        relaxed += sum(indptr[u + 1] - indptr[u] for u in reached)
+        for u in reached:
+            dist[u] = None
+    return steps, relaxed
+
+
+def _bfs(indptr, indices, weights, source, dist):
+    dist[source] = 0
+    reached = [source]
+    for u in reached:
+        level = dist[u] + 1
+        for e in range(indptr[u], indptr[u + 1]):
+            v = indices[e]
+            if dist[v] is None:
+                dist[v] = level
+                reached.append(v)
+    return reached
+
+
+def _dial_search(span):
+    # Dial's algorithm with span buckets, allocated once here. Bucket
+    # d % span holds nodes with tentative distance d. Entries whose
+    # distance has since decreased are skipped when popped, and every
+    # bucket is empty again when a search returns.
+    buckets = [[] for _ in range(span)]
+
+    def dial(indptr, indices, weights, source, dist):
+        buckets[0].append(source)
+        dist[source] = 0
+        reached = []
+        settled = set()
+        pending = 1
+        d = 0
+        while pending:
+            bucket = buckets[d % span]
+            while bucket:
+                u = bucket.pop()
+                pending -= 1
+                if dist[u] != d or u in settled:
+                    continue
+                settled.add(u)
+                reached.append(u)
+                for e in range(indptr[u], indptr[u + 1]):
+                    v = indices[e]
+                    vu_dist = d + weights[e]
+                    if dist[v] is None or vu_dist < dist[v]:
+                        dist[v] = vu_dist
+                        buckets[vu_dist % span].append(v)
+                        pending += 1
+            d += 1
+        return reached
+
+    return dial
+
+
+def _heap(indptr, indices, weights, source, dist):
+    dist[source] = 0
+    reached = []
+    settled = set()
+    heap = [(0, source)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if u in settled:
+            continue
+        settled.add(u)
+        reached.append(u)
+        for e in range(indptr[u], indptr[u + 1]):
+            v = indices[e]
+            vu_dist = d + weights[e]
+            if dist[v] is None or vu_dist < dist[v]:
+                dist[v] = vu_dist
+                heapq.heappush(heap, (vu_dist, v))
+    return reached
+
+
+_ENGINES = ('dial', 'heap')
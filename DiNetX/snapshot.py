@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import json
+import os
+import pickle
+
+import numpy as np
+
+from DiNetX import instrumentation
+from DiNetX.cache import fingerprint
+from DiNetX.compiled import CompiledGraph, as_compiled
+
+
+# Bump when the layout of a snapshot changes.
+_SNAPSHOT_VERSION = 1
+
+_ARRAYS = ('out_indptr', 'out_indices', 'out_weights',
+           'in_indptr', 'in_indices', 'in_weights')
+_META = 'meta.json'
+
+
+def write_snapshot(graph, path):
+    """
+    Save a graph as a binary snapshot directory.
+
+    The snapshot holds one ``.npy`` file per CSR array of both
+    adjacencies, the node labels and a versioned metadata file. The
+    in-adjacency of directed graphs is stored too, so loading never
+    transposes. Integer and string labels are stored as arrays,
+    other labels are pickled.
+
+    :param graph: NetworkX graph, CompiledGraph, sparse matrix or edges
+    :param path: Directory of the snapshot, created if missing
+
+    .. seealso::
+        :py:func:`read_snapshot`
+    """
+    graph = as_compiled(graph)
+    if not os.path.isdir(path):
+        os.makedirs(path)
+
+    names = _ARRAYS if graph.is_directed() else _ARRAYS[:3]
+    for name in names:
+        np.save(os.path.join(path, name + '.npy'), getattr(graph, name))
+    labels = _write_labels(graph.nodes, path)
+
+    # The metadata is written last, a snapshot without it is incomplete.
+    with open(os.path.join(path, _META), 'w') as f:
+        json.dump({'version': _SNAPSHOT_VERSION, 'order': graph.order(),
+                   'directed': graph.is_directed(), 'labels': labels,
+                   'fingerprint': fingerprint(graph)}, f)
+
+
+def read_snapshot(path, mmap=True):
+    """
+    Load a graph saved by :py:func:`write_snapshot`.
+
+    With mmap the arrays are read-only memory maps of the snapshot
+    files, so loading takes a few milliseconds plus the time to read
+    the labels, and processes loading the same snapshot share its
+    pages through the operating system cache. Worker processes of
+    metrics run with n_jobs map the snapshot themselves instead of
+    receiving a shared memory copy of the graph.
+
+    :param path: Directory of the snapshot
+    :param mmap: If False the arrays are read into memory
+    :type mmap: boolean, (default = True)
+    :return: Compiled graph
+    :rtype: CompiledGraph
+
+    :raises ValueError: If the snapshot has an unsupported version
+    """
+    with instrumentation.phase('compile'):
+        graph, meta = _open(path, mmap)
+        graph.nodes = _read_labels(path, meta['labels'])
+        if mmap:
+            graph._snapshot = path
+        return graph
+
+
+###############################################################################
+#                           HELPER FUNCTIONS
+###############################################################################
+
+
+def _open(path, mmap=True):
+    # Graph over the snapshot arrays labeled by index, and the metadata.
+    with open(os.path.join(path, _META)) as f:
+        meta = json.load(f)
+    if meta.get('version') != _SNAPSHOT_VERSION:
+        raise ValueError("Unsupported snapshot version %r"
+                         % meta.get('version'))
+
+    mode = 'r' if mmap else None
+    arrays = dict((name, np.load(os.path.join(path, name + '.npy'),
+                                 mmap_mode=mode))
+                  for name in _ARRAYS[:3])
+    if meta['directed']:
+        for name in _ARRAYS[3:]:
+            arrays[name] = np.load(os.path.join(path, name + '.npy'),
+                                   mmap_mode=mode)
+    else:
+        for name in _ARRAYS[3:]:
+            arrays[name] = arrays[name.replace('in_', 'out_')]
+
+    graph = CompiledGraph._from_arrays(range(meta['order']), meta['directed'],
+                                       **arrays)
+    graph._fingerprint = meta['fingerprint']
+    return graph, meta
+
+
+def _write_labels(nodes, path):
+    if all(type(node) is int for node in nodes):
+        try:
+            labels = np.array(nodes, dtype=np.int64)
+        except OverflowError:
+            pass
+        else:
+            np.save(os.path.join(path, 'labels.npy'), labels)
+            return 'int'
+    elif all(type(node) is str for node in nodes):
+        np.save(os.path.join(path, 'labels.npy'), np.array(nodes, dtype=str))
+        return 'str'
+    with open(os.path.join(path, 'labels.pkl'), 'wb') as f:
+        pickle.dump(list(nodes), f, pickle.HIGHEST_PROTOCOL)
+    return 'pickle'
+
+
+def _read_labels(path, kind):
+    if kind == 'pickle':
+        with open(os.path.join(path, 'labels.pkl'), 'rb') as f:
+            return pickle.load(f)
+    return np.load(os.path.join(path, 'labels.npy')).tolist()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Compare two result files of run_benchmarks.py.
+
+Cases present in both files are matched and the ratio of new to
+base time and peak memory is printed. The exit status is 1 if any
+case got slower than the --threshold ratio, so the script can gate
+a change in CI.
+"""
+
+__author__ = "Tanja Miličić"
+
+import argparse
+import json
+import sys
+
+
+def case_key(record):
+    return (record['family'], record['n'], record['weights'],
+            record['directed'], record['metric'],
+            json.dumps(record['config'], sort_keys=True))
+
+
+def compare(base, new, threshold, min_seconds, out=sys.stdout):
+    """
+    Print time and memory ratios of matching cases and return the
+    keys of the cases whose time ratio exceeds threshold.
+    """
+    base = dict((case_key(r), r) for r in base['results'])
+    regressions = []
+    for record in new['results']:
+        key = case_key(record)
+        if key not in base:
+            continue
+        old = base[key]
+        time_ratio = record['seconds'] / max(old['seconds'], 1e-12)
+        memory_ratio = float(record['peak_bytes']) / max(old['peak_bytes'], 1)
+        slower = time_ratio > threshold and \
+            max(record['seconds'], old['seconds']) >= min_seconds
+        if slower:
+            regressions.append(key)
+        out.write('%-16s n=%-6d %-11s %-3s %-24s %-40s %9.4fs %9.4fs '
+                  'x%5.2f mem x%5.2f%s\n' % (
+                      key[0], key[1], key[2], 'dir' if key[3] else 'und',
+                      key[4], key[5], old['seconds'], record['seconds'],
+                      time_ratio, memory_ratio,
+                      '  REGRESSION' if slower else ''))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('base')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='time ratio above which a case regressed')
+    parser.add_argument('--min-seconds', type=float, default=1e-3,
+                        help='ignore cases faster than this in both runs')
+    args = parser.parse_args(argv)
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    regressions = compare(base, new, args.threshold, args.min_seconds)
+    if regressions:
+        sys.stdout.write('%d regressions\n' % len(regressions))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Time every DiNetX metric on seeded synthetic graphs.
+
+Graphs of each family, size and weight distribution are generated
+from a fixed seed, compiled once, and every metric is run in its
+weighted/unweighted and directed/undirected configurations. Wall
+time (best of --repeat runs after one warm-up run) and the peak
+memory traced during the warm-up run are written to a JSON file
+that :file:`compare_benchmarks.py` can diff against another run.
+
+Example::
+
+    python benchmarks/run_benchmarks.py --sizes 200 1000 -o base.json
+    python benchmarks/run_benchmarks.py --sizes 200 1000 -o new.json
+    python benchmarks/compare_benchmarks.py base.json new.json
+"""
+
+__author__ = "Tanja Miličić"
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import networkx as nx
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+
+from DiNetX import CompiledGraph
+from DiNetX import (accessibility, degree_centrality, edgelist, efficiency,
+                    h_degree)
+
+
+FAMILIES = ('erdos_renyi', 'barabasi_albert', 'scale_free', 'grid')
+WEIGHTS = ('unit', 'integer', 'wide_integer', 'exponential')
+MEAN_DEGREE = 4
+ALPHAS = (0., 0.5, 1., 1.5)
+# Nodes removed by the vulnerability benchmark, each costs up to a
+# recomputation of global efficiency.
+VULNERABLE = 16
+
+
+def make_graph(family, n, directed, weights, seed):
+    """
+    Generate a seeded benchmark graph with integer node labels.
+
+    :param family: One of FAMILIES
+    :param n: Approximate number of nodes
+    :param directed: Whether the graph is directed
+    :param weights:
+        'unit' for weight 1, 'integer' for uniform integers 1..10,
+        'wide_integer' for uniform integers 1..65536, 'exponential'
+        for float weights with mean 1
+    :param seed: Seed of the graph and of the weights
+    :rtype: NetworkX graph
+    """
+    if family == 'erdos_renyi':
+        graph = nx.gnp_random_graph(n, float(MEAN_DEGREE) / n, seed=seed,
+                                    directed=directed)
+    elif family == 'barabasi_albert':
+        graph = nx.barabasi_albert_graph(n, MEAN_DEGREE // 2, seed=seed)
+        if directed:
+            graph = _orient(graph, seed)
+    elif family == 'scale_free':
+        graph = nx.DiGraph(nx.scale_free_graph(n, seed=seed))
+        graph.remove_edges_from(list(graph.selfloop_edges())
+                                if hasattr(graph, 'selfloop_edges')
+                                else list(nx.selfloop_edges(graph)))
+        if not directed:
+            graph = graph.to_undirected()
+    elif family == 'grid':
+        side = max(2, int(round(np.sqrt(n))))
+        graph = nx.convert_node_labels_to_integers(
+            nx.grid_2d_graph(side, side))
+        if directed:
+            graph = graph.to_directed()
+    else:
+        raise ValueError("Unknown graph family %r" % family)
+
+    rng = np.random.RandomState(seed)
+    edges = list(graph.edges())
+    if weights == 'unit':
+        values = [1] * len(edges)
+    elif weights == 'integer':
+        values = rng.randint(1, 11, size=len(edges)).tolist()
+    elif weights == 'wide_integer':
+        values = rng.randint(1, (1 << 16) + 1, size=len(edges)).tolist()
+    elif weights == 'exponential':
+        values = rng.exponential(1., size=len(edges)).tolist()
+    else:
+        raise ValueError("Unknown weight distribution %r" % weights)
+    for (u, v), weight in zip(edges, values):
+        graph[u][v]['weight'] = weight
+
+    return graph
+
+
+def _orient(graph, seed, reciprocal=0.2):
+    # Give every undirected edge a random direction, keeping both
+    # directions for a fraction of them.
+    rng = np.random.RandomState(seed)
+    directed = nx.DiGraph()
+    directed.add_nodes_from(graph.nodes())
+    for (u, v), draw in zip(graph.edges(), rng.random_sample(
+            graph.number_of_edges())):
+        if draw < reciprocal:
+            directed.add_edges_from([(u, v), (v, u)])
+        elif draw < (1. + reciprocal) / 2.:
+            directed.add_edge(u, v)
+        else:
+            directed.add_edge(v, u)
+    return directed
+
+
+def write_edgelist(graph, path):
+    """Write graph as lines 'source target weight' to path."""
+    with open(path, 'w') as f:
+        for u, v, weight in graph.edges(data='weight'):
+            f.write('%s %s %r\n' % (u, v, weight))
+
+
+def metric_cases(directed, h, edgelist_path=None):
+    """
+    Yield (name, config, function) for every metric configuration
+    that applies to a directed or undirected graph. Edge list
+    loaders read edgelist_path, which holds the same graph, and are
+    skipped if it is None.
+    """
+    for weight in (True, False):
+        config = {'weight': weight}
+        yield ('global_efficiency', config,
+               lambda g, w=weight: efficiency.global_efficiency(g, w))
+        yield ('nodal_efficiency', config,
+               lambda g, w=weight: efficiency.nodal_efficiency(g, w))
+        yield ('vulnerability', {'weight': weight, 'nodes': VULNERABLE},
+               lambda g, w=weight: efficiency.vulnerability(
+                   g, _first_nodes(g, VULNERABLE), weight=w))
+        yield ('local_efficiency', config,
+               lambda g, w=weight: efficiency.local_efficiency(g, w))
+        yield ('node_local_efficiency', config,
+               lambda g, w=weight: efficiency.node_local_efficiency(g, w))
+        yield ('global_efficiency', {'weight': weight, 'n_jobs': 2},
+               lambda g, w=weight: efficiency.global_efficiency(
+                   g, w, n_jobs=2))
+        yield ('approximate_global_efficiency',
+               {'weight': weight, 'samples': 32},
+               lambda g, w=weight: efficiency.approximate_global_efficiency(
+                   g, 32, seed=0, weight=w))
+        if directed:
+            config = {'weight': weight, 'to_undirected': True}
+            yield ('global_efficiency', config,
+                   lambda g, w=weight: efficiency.global_efficiency(
+                       g, w, True))
+            yield ('local_efficiency', config,
+                   lambda g, w=weight: efficiency.local_efficiency(
+                       g, w, True))
+
+    for weighted in (True, False):
+        config = {'weighted': weighted, 'h': h}
+        functions = [accessibility.accessibility]
+        if directed:
+            functions += [accessibility.in_accessibility,
+                          accessibility.out_accessibility]
+        for function in functions:
+            yield (function.__name__, config,
+                   lambda g, f=function, w=weighted: f(g, w, h,
+                                                       output='array'))
+        functions = [accessibility.iter_accessibility]
+        if directed:
+            functions += [accessibility.iter_in_accessibility,
+                          accessibility.iter_out_accessibility]
+        for function in functions:
+            yield (function.__name__, config,
+                   lambda g, f=function, w=weighted: _consume(f(g, w, h)))
+        yield ('approximate_accessibility',
+               {'weighted': weighted, 'h': h, 'samples': 100},
+               lambda g, w=weighted: accessibility.approximate_accessibility(
+                   g, w, h, samples=100, seed=0, output='array'))
+
+    functions = [h_degree.h_degree, degree_centrality.degree_centrality]
+    if directed:
+        functions += [h_degree.in_h_degree, h_degree.out_h_degree,
+                      degree_centrality.in_degree_centrality,
+                      degree_centrality.out_degree_centrality]
+    for function in functions:
+        yield function.__name__, {}, function
+    yield ('degree_centrality_matrix', {'alphas': list(ALPHAS)},
+           lambda g: degree_centrality.degree_centrality_matrix(g, ALPHAS))
+
+    functions = [h_degree.iter_h_degree,
+                 degree_centrality.iter_degree_centrality]
+    if directed:
+        functions += [h_degree.iter_in_h_degree, h_degree.iter_out_h_degree,
+                      degree_centrality.iter_in_degree_centrality,
+                      degree_centrality.iter_out_degree_centrality]
+    for function in functions:
+        yield function.__name__, {}, lambda g, f=function: _consume(f(g))
+
+    if edgelist_path is not None:
+        yield ('read_edgelist', {},
+               lambda g: edgelist.read_edgelist(edgelist_path,
+                                                directed=directed))
+        yield ('stream_degree_centrality', {},
+               lambda g: edgelist.stream_degree_centrality(
+                   edgelist_path, directed=directed))
+
+
+def _first_nodes(graph, k):
+    nodes = graph.nodes if isinstance(graph, CompiledGraph) \
+        else list(graph.nodes())
+    return nodes[:k]
+
+
+def _consume(records):
+    for _ in records:
+        pass
+
+
+def measure(function, graph, repeat):
+    """
+    Return the best wall time of repeat calls and the peak memory
+    traced during a warm-up call before them.
+
+    Tracing slows allocations down, so the timed calls run with it
+    off and the cold first call is never timed.
+    """
+    gc.collect()
+    tracemalloc.start()
+    function(graph)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    times = []
+    for _ in range(max(1, repeat)):
+        gc.collect()
+        start = time.perf_counter()
+        function(graph)
+        times.append(time.perf_counter() - start)
+
+    return min(times), peak
+
+
+def run(families, sizes, weights, seed, repeat, h, metrics, use_networkx,
+        log=sys.stderr):
+    results = []
+    directory = tempfile.mkdtemp()
+    try:
+        for family in families:
+            for n in sizes:
+                for weight in weights:
+                    for directed in (True, False):
+                        graph = make_graph(family, n, directed, weight, seed)
+                        results.extend(run_graph(
+                            graph, family, n, weight, directed, repeat, h,
+                            metrics, use_networkx, directory, log))
+    finally:
+        shutil.rmtree(directory)
+    return results
+
+
+def run_graph(graph, family, n, weight, directed, repeat, h, metrics,
+              use_networkx, directory, log=sys.stderr):
+    results = []
+    start = time.perf_counter()
+    compiled = CompiledGraph.from_networkx(graph)
+    compile_seconds = time.perf_counter() - start
+    target = graph if use_networkx else compiled
+    path = os.path.join(directory, 'edges.txt')
+    write_edgelist(graph, path)
+
+    for name, config, function in metric_cases(directed, h, path):
+        if metrics and name not in metrics:
+            continue
+        seconds, peak = measure(function, target, repeat)
+        record = {
+            'family': family,
+            'n': n,
+            'nodes': graph.order(),
+            'edges': graph.number_of_edges(),
+            'directed': directed,
+            'weights': weight,
+            'metric': name,
+            'config': config,
+            'seconds': seconds,
+            'peak_bytes': peak,
+            'compile_seconds': compile_seconds,
+        }
+        results.append(record)
+        log.write('%-16s n=%-6d %-11s %-8s %-24s %-40s '
+                  '%9.4fs %8.1f MiB\n' % (
+                      family, n, weight,
+                      'directed' if directed else 'undirected',
+                      name, json.dumps(config, sort_keys=True),
+                      seconds, peak / 2. ** 20))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-o', '--output', default='benchmarks.json',
+                        help='JSON file the results are written to')
+    parser.add_argument('--families', nargs='+', default=list(FAMILIES),
+                        choices=FAMILIES)
+    parser.add_argument('--sizes', nargs='+', type=int, default=[200, 1000])
+    parser.add_argument('--weights', nargs='+', default=list(WEIGHTS),
+                        choices=WEIGHTS)
+    parser.add_argument('--metrics', nargs='+', default=None,
+                        help='only run these metric functions')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--h', type=int, default=3,
+                        help='number of steps for accessibility')
+    parser.add_argument('--networkx', action='store_true',
+                        help='pass NetworkX graphs instead of compiled ones')
+    args = parser.parse_args(argv)
+
+    results = run(args.families, args.sizes, args.weights, args.seed,
+                  args.repeat, args.h, args.metrics, args.networkx)
+    report = {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'networkx': nx.__version__,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'networkx_input': args.networkx,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=1, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
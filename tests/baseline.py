@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Random graphs and recomputations of the metrics in the style of the
+original NetworkX implementation, shared by the tests.
+"""
+
+__author__ = "Tanja Miličić"
+
+import math
+
+import networkx as nx
+
+
+def random_graph(rng, n, p, directed, weights):
+    graph = nx.DiGraph() if directed else nx.Graph()
+    graph.add_nodes_from(range(n))
+    for u in range(n):
+        for v in range(n):
+            if u != v and rng.random() < p:
+                graph.add_edge(u, v, weight=rng.choice(weights))
+    return graph
+
+
+def global_efficiency(graph, weight=True):
+    n = graph.order()
+    sum_dij = 0
+    for node in graph.nodes():
+        if weight:
+            lengths = nx.single_source_dijkstra_path_length(graph, node)
+        else:
+            lengths = nx.single_source_shortest_path_length(graph, node)
+        sum_dij += sum(1. / d_ij for d_ij in lengths.values() if d_ij != 0)
+    if n < 2:
+        return 0
+    return sum_dij / (n * (n - 1))
+
+
+def local_efficiency(graph, weight=True):
+    total = 0
+    for node in graph:
+        neighbors = [v for v in graph.neighbors(node) if v != node]
+        total += global_efficiency(graph.subgraph(neighbors), weight)
+    return total / graph.order()
+
+
+def h_degree(graph):
+    values = {}
+    for node in graph:
+        weights = sorted((data['weight'] for _, _, data
+                          in graph.edges(node, data=True)), reverse=True)
+        h = sum(1 for rank, w in enumerate(weights, 1) if w >= rank)
+        values[node] = max(h, 1)
+    return values
+
+
+def accessibility(graph, weighted=True, h=3, reverse=False):
+    # Level j of a node holds the edges leaving the nodes reached from
+    # it in exactly j - 1 steps, incoming edges if reverse is set.
+    adj = graph.pred if reverse else graph.adj
+    values = {}
+    for node in graph:
+        frontier = set([node])
+        for j in range(1, h + 1):
+            mass = {}
+            total = 0
+            for u in frontier:
+                for v, data in adj[u].items():
+                    weight = data['weight'] if weighted else 1
+                    total += int(weight)
+                    mass[v] = mass.get(v, 0) + float(weight)
+            acc = 0
+            for m in mass.values():
+                p_ij = m / total if total else 0
+                if p_ij > 0:
+                    acc -= p_ij * math.log(p_ij)
+            values[str(node) + '_h_' + str(j)] = math.exp(acc)
+            frontier = set(mass)
+    return values
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from DiNetX.accessibility import (AccessibilityQuery, _adjacency,
+                                  _sparse_blocks, accessibility,
+                                  approximate_accessibility,
+                                  in_accessibility, out_accessibility)
+from DiNetX.compiled import CompiledGraph
+
+import baseline
+
+
+def random_graph(seed, n, m, weights, directed=True):
+    rng = np.random.RandomState(seed)
+    return CompiledGraph.from_edges(rng.randint(0, n, m), rng.randint(0, n, m),
+                                    weights(rng, m), nodes=range(n),
+                                    directed=directed)
+
+
+class AccessibilityTest(unittest.TestCase):
+
+    def assertValuesEqual(self, values, expected):
+        self.assertEqual(sorted(values), sorted(expected))
+        for key, value in expected.items():
+            self.assertAlmostEqual(values[key], value, places=9)
+
+    def test_against_networkx_recomputation(self):
+        rng = random.Random(11)
+        for directed in (True, False):
+            for weights in ([1, 2, 3], [0.5, 1.5, 2, 4]):
+                graph = baseline.random_graph(rng, 30, 0.08, directed,
+                                              weights)
+                compiled = CompiledGraph.from_networkx(graph)
+                for weighted in (True, False):
+                    expected = baseline.accessibility(graph, weighted, 4)
+                    self.assertValuesEqual(
+                        accessibility(compiled, weighted, 4), expected)
+                    self.assertValuesEqual(accessibility(graph, weighted, 4),
+                                           expected)
+                    if not directed:
+                        continue
+                    self.assertValuesEqual(
+                        out_accessibility(compiled, weighted, 4), expected)
+                    self.assertValuesEqual(
+                        in_accessibility(compiled, weighted, 4),
+                        baseline.accessibility(graph, weighted, 4, True))
+
+    def test_undirected_in_accessibility(self):
+        graph = nx.Graph([(0, 1)])
+        self.assertRaises(nx.NetworkXError, in_accessibility, graph)
+        self.assertRaises(nx.NetworkXError, out_accessibility, graph)
+
+    def test_batches(self):
+        graph = random_graph(12, 100, 400, lambda rng, m: rng.randint(1, 5, m))
+        for direction in ('out', 'in'):
+            indptr, indices, weights = _adjacency(graph, direction)
+            single = list(_sparse_blocks(100, indptr, indices, weights, True,
+                                         5))
+            self.assertEqual(len(single), 1)
+            blocks = list(_sparse_blocks(100, indptr, indices, weights, True,
+                                         5, batch_size=7, first=14))
+            self.assertEqual([start for start, _ in blocks],
+                             list(range(14, 100, 7)))
+            np.testing.assert_allclose(
+                np.concatenate([values for _, values in blocks]),
+                single[0][1][14:], rtol=1e-12)
+
+
+class ArrayOutputTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_array_matches_dict(self):
+        graph = random_graph(13, 50, 200, lambda rng, m: rng.randint(1, 5, m))
+        values = accessibility(graph, h=3)
+        array, nodes = accessibility(graph, h=3, output='array')
+        self.assertEqual(array.shape, (50, 3))
+        self.assertEqual(nodes, graph.nodes)
+        for i, node in enumerate(nodes):
+            for j in range(1, 4):
+                self.assertEqual(array[i, j - 1],
+                                 values['%s_h_%d' % (node, j)])
+        self.assertRaises(ValueError, accessibility, graph, output='list')
+
+    def test_memory_mapped_output(self):
+        graph = random_graph(14, 50, 200, lambda rng, m: rng.randint(1, 5, m))
+        expected = accessibility(graph, h=3, output='array')[0]
+        path = os.path.join(self.directory, 'values.npy')
+        values, nodes = in_accessibility(graph, h=3, out=path)
+        self.assertIsInstance(values, np.memmap)
+        self.assertEqual(nodes, graph.nodes)
+        np.testing.assert_array_equal(
+            np.load(path), in_accessibility(graph, h=3, output='array')[0])
+        del values
+
+        values, _ = accessibility(graph, h=3, out=path, nodes=[3, 1])
+        np.testing.assert_allclose(values, expected[[3, 1]], rtol=1e-12)
+
+
+class AccessibilityQueryTest(unittest.TestCase):
+
+    def test_selected_nodes_match_all_nodes(self):
+        rng = random.Random(15)
+        graph = random_graph(15, 120, 480, lambda rng, m: rng.randint(1, 5, m))
+        for weighted in (True, False):
+            full = {
+                'out': accessibility(graph, weighted, 4, output='array')[0],
+                'in': in_accessibility(graph, weighted, 4, output='array')[0],
+            }
+            for direction, function in (('out', accessibility),
+                                        ('in', in_accessibility)):
+                nodes = rng.sample(graph.nodes, 10)
+                values, selected = function(graph, weighted, 4,
+                                            output='array', nodes=nodes)
+                self.assertEqual(selected, nodes)
+                np.testing.assert_allclose(values, full[direction][nodes],
+                                           rtol=1e-12)
+
+                # A tiny cache evicts neighborhoods while they are used.
+                for cache_size in (3, 65536):
+                    query = AccessibilityQuery(graph, direction, weighted,
+                                               cache_size=cache_size)
+                    for _ in range(2):
+                        nodes = rng.sample(graph.nodes, 10)
+                        np.testing.assert_allclose(
+                            query.query(nodes, 4, output='array')[0],
+                            full[direction][nodes], rtol=1e-12)
+                    self.assertLessEqual(len(query._cache), cache_size)
+
+    def test_dictionary_output(self):
+        graph = random_graph(16, 30, 90, lambda rng, m: rng.randint(1, 5, m))
+        query = AccessibilityQuery(graph)
+        values = query.query([4, 7], h=2)
+        full = accessibility(graph, h=2)
+        self.assertEqual(sorted(values), ['4_h_1', '4_h_2', '7_h_1', '7_h_2'])
+        for key, value in values.items():
+            self.assertAlmostEqual(value, full[key], places=12)
+
+    def test_bad_arguments(self):
+        graph = random_graph(17, 10, 20, lambda rng, m: None, False)
+        self.assertRaises(nx.NetworkXError, AccessibilityQuery, graph, 'in')
+        self.assertRaises(ValueError, AccessibilityQuery, graph, 'both')
+        self.assertRaises(ValueError, AccessibilityQuery(graph).query, [0],
+                          output='list')
+
+
+class ApproximateAccessibilityTest(unittest.TestCase):
+
+    def test_converges_to_accessibility(self):
+        cases = [(True, lambda rng, m: rng.randint(1, 6, m), True),
+                 (False, lambda rng, m: None, True),
+                 (True, lambda rng, m: rng.randint(0, 3, m), False),
+                 (True, lambda rng, m: rng.uniform(0.5, 3, m), True)]
+        for seed, (weighted, weights, directed) in enumerate(cases):
+            graph = random_graph(seed, 120, 480, weights, directed)
+            exact = accessibility(graph, weighted, 5, output='array')[0]
+            values, errors, _ = approximate_accessibility(
+                graph, weighted, 5, samples=4000, seed=seed, output='array')
+            np.testing.assert_allclose(values, exact, rtol=0.05)
+            self.assertLess(np.abs(values / exact - 1).mean(), 0.01)
+            self.assertTrue((errors >= 0).all())
+
+    def test_reproducible_subset(self):
+        graph = random_graph(9, 80, 320, lambda rng, m: rng.randint(1, 4, m))
+        values, errors = approximate_accessibility(graph, h=4, samples=50,
+                                                   seed=3)
+        again = approximate_accessibility(graph, h=4, samples=50, seed=3)
+        self.assertEqual((values, errors), again)
+
+        nodes = [5, 17, 60]
+        subset = approximate_accessibility(graph, h=4, samples=50, seed=3,
+                                           nodes=nodes, output='array')
+        self.assertEqual(subset[0].shape, (3, 4))
+        self.assertEqual(subset[2], nodes)
+        self.assertEqual(sorted(subset[0].ravel().tolist()),
+                         sorted(values[key] for key in values
+                                if int(key.split('_')[0]) in nodes))
+
+    def test_nodes_without_edges(self):
+        graph = CompiledGraph.from_edges([0, 1], [1, 0], nodes=range(3))
+        values, errors, _ = approximate_accessibility(
+            graph, h=2, samples=10, seed=0, output='array')
+        np.testing.assert_array_equal(values, np.ones((3, 2)))
+        np.testing.assert_array_equal(errors, np.zeros((3, 2)))
+
+    def test_bad_arguments(self):
+        graph = random_graph(0, 10, 20, lambda rng, m: None, False)
+        self.assertRaises(ValueError, approximate_accessibility, graph,
+                          samples=0)
+        self.assertRaises(Exception, approximate_accessibility, graph,
+                          direction='in')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import random
+import shutil
+import tempfile
+import unittest
+
+from DiNetX import cache
+from DiNetX.accessibility import approximate_accessibility
+from DiNetX.compiled import as_compiled
+from DiNetX.efficiency import global_efficiency
+from DiNetX.h_degree import h_degree
+
+import baseline
+
+
+class ResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(16)
+        self.graph = baseline.random_graph(rng, 25, 0.15, True, [1, 2, 3])
+        self.store = cache.enable()
+
+    def tearDown(self):
+        cache.disable()
+
+    def test_repeated_call_hits(self):
+        first = global_efficiency(self.graph)
+        self.assertEqual((self.store.hits, self.store.misses), (0, 1))
+        self.assertEqual(global_efficiency(self.graph), first)
+        self.assertEqual((self.store.hits, self.store.misses), (1, 1))
+        # Arguments that do not change the result share the entry.
+        global_efficiency(self.graph, n_jobs=2, engine='heap')
+        self.assertEqual(self.store.hits, 2)
+
+    def test_changed_graph_misses(self):
+        before = global_efficiency(self.graph)
+        changed = self.graph.copy()
+        u, v = next(iter(changed.edges()))
+        changed[u][v]['weight'] += 5
+        after = global_efficiency(changed)
+        self.assertEqual(self.store.misses, 2)
+        self.assertAlmostEqual(after, baseline.global_efficiency(changed),
+                               places=12)
+        self.assertNotAlmostEqual(before, after, places=12)
+
+        relabelled = self.graph.copy()
+        relabelled.add_node('isolated')
+        global_efficiency(relabelled)
+        self.assertEqual(self.store.misses, 3)
+
+    def test_changed_arguments_miss(self):
+        global_efficiency(self.graph, weight=True)
+        global_efficiency(self.graph, weight=False)
+        global_efficiency(self.graph, to_undirected=True)
+        self.assertEqual((self.store.hits, self.store.misses), (0, 3))
+
+    def test_compiled_and_networkx_share_entries(self):
+        h_degree(self.graph)
+        h_degree(as_compiled(self.graph))
+        self.assertEqual((self.store.hits, self.store.misses), (1, 1))
+
+    def test_results_are_copies(self):
+        result = h_degree(self.graph)
+        expected = dict(result)
+        result.clear()
+        self.assertEqual(h_degree(self.graph), expected)
+
+    def test_unseeded_runs_bypass(self):
+        approximate_accessibility(self.graph, samples=10)
+        approximate_accessibility(self.graph, samples=10)
+        self.assertEqual((self.store.hits, self.store.misses), (0, 0))
+        approximate_accessibility(self.graph, samples=10, seed=1)
+        approximate_accessibility(self.graph, samples=10, seed=1)
+        self.assertEqual((self.store.hits, self.store.misses), (1, 1))
+
+    def test_least_recently_used_evicted(self):
+        store = cache.enable(maxsize=2)
+        graphs = [self.graph.subgraph(list(self.graph)[:size]).copy()
+                  for size in (10, 15, 20)]
+        h_degree(graphs[0])
+        h_degree(graphs[1])
+        h_degree(graphs[0])
+        h_degree(graphs[2])
+        self.assertEqual(len(store), 2)
+        h_degree(graphs[0])
+        self.assertEqual(store.hits, 2)
+        h_degree(graphs[1])
+        self.assertEqual(store.misses, 4)
+
+    def test_byte_limit(self):
+        store = cache.enable(maxbytes=1)
+        h_degree(self.graph)
+        global_efficiency(self.graph)
+        # The newest result is kept even when it alone is too large.
+        self.assertEqual(len(store), 1)
+        global_efficiency(self.graph)
+        self.assertEqual(store.hits, 1)
+
+    def test_disk_store_survives(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        cache.enable(path=path)
+        expected = h_degree(self.graph)
+        store = cache.enable(path=path)
+        self.assertEqual(h_degree(self.graph), expected)
+        self.assertEqual((store.hits, store.misses), (1, 0))
+
+    def test_disable(self):
+        cache.disable()
+        self.assertIsNone(cache.active())
+        h_degree(self.graph)
+        self.assertEqual((self.store.hits, self.store.misses), (0, 0))
+
+    def test_fingerprint(self):
+        compiled = as_compiled(self.graph)
+        self.assertEqual(cache.fingerprint(self.graph),
+                         cache.fingerprint(compiled))
+        undirected = as_compiled(self.graph, True)
+        self.assertNotEqual(cache.fingerprint(compiled),
+                            cache.fingerprint(undirected))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from DiNetX.accessibility import accessibility
+from DiNetX.checkpoint import Checkpoint, checkpointed_map
+from DiNetX.compiled import CompiledGraph
+from DiNetX.efficiency import global_efficiency, nodal_efficiency
+
+import baseline
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt(counts, saves):
+    # Record the done counts of Checkpoint.advance in counts and raise
+    # Interrupted after the given number of saves.
+    advance = Checkpoint.advance
+
+    def interrupting_advance(state, done):
+        advance(state, done)
+        counts.append(done)
+        if len(counts) == saves:
+            raise Interrupted()
+
+    return mock.patch.object(Checkpoint, 'advance', interrupting_advance)
+
+
+class CheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.path = os.path.join(root, 'checkpoint')
+        # Save on every advance and use small ranges of sources.
+        for patch in (mock.patch.object(Checkpoint.__init__, '__defaults__',
+                                        (0.,)),
+                      mock.patch.object(checkpointed_map, '__defaults__',
+                                        (7,))):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def run_interrupted(self, function, *args, **kwargs):
+        # Run function until its checkpoint advanced twice, then run it
+        # again. Return the result and the done counts of both runs.
+        counts = []
+        with interrupt(counts, 2):
+            self.assertRaises(Interrupted, function, *args, **kwargs)
+        with open(os.path.join(self.path, 'meta.json')) as f:
+            self.assertEqual(json.load(f)['done'], counts[-1])
+
+        resumed = []
+        with interrupt(resumed, None):
+            result = function(*args, **kwargs)
+        self.assertFalse(os.path.exists(self.path))
+        return result, counts, resumed
+
+    def test_global_efficiency_resumes(self):
+        rng = random.Random(25)
+        graph = baseline.random_graph(rng, 40, 0.1, True, [1, 2, 3])
+        result, interrupted, resumed = self.run_interrupted(
+            global_efficiency, graph, checkpoint=self.path)
+        self.assertEqual(interrupted, [7, 14])
+        self.assertEqual(resumed, [21, 28, 35, 40])
+        self.assertEqual(result, global_efficiency(graph))
+
+        result, _, resumed = self.run_interrupted(
+            nodal_efficiency, graph, weight=False, checkpoint=self.path)
+        self.assertEqual(resumed[0], 21)
+        self.assertEqual(result, nodal_efficiency(graph, weight=False))
+
+    def test_accessibility_resumes(self):
+        rng = np.random.RandomState(25)
+        n, m = 1100, 4000
+        graph = CompiledGraph.from_edges(rng.randint(0, n, m),
+                                         rng.randint(0, n, m),
+                                         rng.randint(1, 4, m),
+                                         nodes=range(n))
+        result, interrupted, resumed = self.run_interrupted(
+            accessibility, graph, h=3, output='array', checkpoint=self.path)
+        self.assertEqual(interrupted, [512, 1024])
+        self.assertEqual(resumed, [1100])
+        expected, nodes = accessibility(graph, h=3, output='array')
+        self.assertEqual(result[1], nodes)
+        np.testing.assert_array_equal(result[0], expected)
+
+    def test_other_computation_refused(self):
+        rng = random.Random(26)
+        graph = baseline.random_graph(rng, 30, 0.1, True, [1, 2, 3])
+        with interrupt([], 1):
+            self.assertRaises(Interrupted, global_efficiency, graph,
+                              checkpoint=self.path)
+        self.assertRaises(ValueError, global_efficiency, graph,
+                          weight=False, checkpoint=self.path)
+        changed = graph.copy()
+        changed.add_edge(0, 1, weight=9)
+        self.assertRaises(ValueError, global_efficiency, changed,
+                          checkpoint=self.path)
+        self.assertRaises(ValueError, accessibility, graph,
+                          checkpoint=self.path)
+        self.assertAlmostEqual(global_efficiency(graph, checkpoint=self.path),
+                               baseline.global_efficiency(graph, True),
+                               places=12)
+
+    def test_version_error(self):
+        state = Checkpoint(self.path, 'key', (3,))
+        state.save()
+        meta = os.path.join(self.path, 'meta.json')
+        with open(meta) as f:
+            content = json.load(f)
+        content['version'] = 0
+        with open(meta, 'w') as f:
+            json.dump(content, f)
+        self.assertRaises(ValueError, Checkpoint, self.path, 'key', (3,))
+
+
+if __name__ == '__main__':
+    unittest.main()
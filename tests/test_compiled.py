@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import random
+import unittest
+
+import numpy as np
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+from DiNetX.compiled import CompiledGraph
+from DiNetX.degree_centrality import degree_centrality
+from DiNetX.efficiency import global_efficiency, local_efficiency
+from DiNetX.h_degree import h_degree
+
+import baseline
+
+
+class CompiledMetricsTest(unittest.TestCase):
+
+    def test_against_networkx_recomputation(self):
+        rng = random.Random(1)
+        for trial in range(12):
+            directed = trial % 2 == 0
+            weights = [1, 2, 3, 7] if trial % 3 else [0.5, 1.25, 4.]
+            graph = baseline.random_graph(rng, 25, 0.15, directed, weights)
+            compiled = CompiledGraph.from_networkx(graph)
+
+            for weight in (True, False):
+                self.assertAlmostEqual(
+                    global_efficiency(compiled, weight),
+                    baseline.global_efficiency(graph, weight), places=12)
+                self.assertAlmostEqual(
+                    local_efficiency(compiled, weight),
+                    baseline.local_efficiency(graph, weight), places=12)
+            self.assertEqual(h_degree(compiled), baseline.h_degree(graph))
+
+            for alpha in (0, 0.5, 1.5):
+                expected = {}
+                for node in graph:
+                    k = graph.degree(node)
+                    s = graph.degree(node, weight='weight')
+                    expected[node] = k * (float(s) / k) ** alpha if k else 0
+                result = degree_centrality(compiled, alpha)
+                for node, value in expected.items():
+                    self.assertAlmostEqual(result[node], value, places=9)
+
+    def test_networkx_graph_input(self):
+        rng = random.Random(5)
+        graph = baseline.random_graph(rng, 15, 0.2, True, [1, 2, 3])
+        compiled = CompiledGraph.from_networkx(graph)
+        self.assertEqual(compiled.nodes, list(graph.nodes()))
+        self.assertEqual(compiled.number_of_edges(), graph.number_of_edges())
+        self.assertEqual(global_efficiency(graph), global_efficiency(compiled))
+
+
+class ArrayInputTest(unittest.TestCase):
+
+    def test_edge_arrays(self):
+        rng = random.Random(6)
+        for directed in (True, False):
+            graph = baseline.random_graph(rng, 20, 0.15, directed, [1, 2, 5])
+            src, dst = zip(*graph.edges())
+            weights = [graph[u][v]['weight'] for u, v in graph.edges()]
+            compiled = CompiledGraph.from_edges(src, dst, weights,
+                                                nodes=range(20),
+                                                directed=directed)
+            self.assertEqual(compiled.number_of_edges(),
+                             graph.number_of_edges())
+            self.assertEqual(global_efficiency(compiled),
+                             global_efficiency(graph))
+
+        graph = baseline.random_graph(rng, 20, 0.15, True, [1, 2, 5])
+        src, dst = (np.array(a) for a in zip(*graph.edges()))
+        weights = np.array([graph[u][v]['weight'] for u, v in graph.edges()])
+        self.assertAlmostEqual(global_efficiency((src, dst, weights)),
+                               baseline.global_efficiency(graph), places=12)
+
+    def test_repeated_edges_keep_last_weight(self):
+        compiled = CompiledGraph.from_edges([0, 1, 0], [1, 2, 1], [5, 1, 2])
+        self.assertEqual(compiled.out_indices.tolist(), [1, 2])
+        self.assertEqual(compiled.out_weights.tolist(), [2, 1])
+
+    def test_bad_indices(self):
+        self.assertRaises(ValueError, CompiledGraph.from_edges, [0, -1],
+                          [1, 0])
+        self.assertRaises(ValueError, CompiledGraph.from_edges, [0, 1],
+                          [1, 2], nodes='ab')
+
+    def test_no_edges(self):
+        for directed in (True, False):
+            compiled = CompiledGraph.from_edges([], [], nodes='abc',
+                                                directed=directed)
+            self.assertEqual(compiled.out_indptr.tolist(), [0, 0, 0, 0])
+            self.assertEqual(compiled.number_of_edges(), 0)
+            self.assertEqual(global_efficiency(compiled), 0)
+            self.assertEqual(local_efficiency(compiled), 0)
+        empty = np.zeros(0, dtype=np.int64)
+        self.assertEqual(global_efficiency((empty, empty)), 0)
+
+    @unittest.skipIf(sparse is None, "SciPy not available")
+    def test_scipy(self):
+        rng = random.Random(7)
+        for directed in (True, False):
+            graph = baseline.random_graph(rng, 20, 0.15, directed, [1, 2, 5])
+            arcs = list(graph.edges(data='weight'))
+            if not directed:
+                arcs += [(v, u, w) for u, v, w in arcs]
+            src, dst, weights = zip(*arcs)
+            matrix = sparse.coo_matrix((weights, (src, dst)), shape=(20, 20))
+            compiled = CompiledGraph.from_scipy(matrix, directed=directed)
+            self.assertEqual(compiled.number_of_edges(),
+                             graph.number_of_edges())
+            self.assertAlmostEqual(global_efficiency(compiled),
+                                   baseline.global_efficiency(graph),
+                                   places=12)
+        self.assertAlmostEqual(global_efficiency(matrix.tocsr()),
+                               baseline.global_efficiency(graph), places=12)
+
+    @unittest.skipIf(sparse is None, "SciPy not available")
+    def test_scipy_duplicates_are_summed(self):
+        matrix = sparse.coo_matrix(([1, 2, 4], ([0, 0, 1], [1, 1, 0])),
+                                   shape=(2, 2))
+        compiled = CompiledGraph.from_scipy(matrix)
+        self.assertEqual(compiled.out_weights.tolist(), [3, 4])
+
+    @unittest.skipIf(sparse is None, "SciPy not available")
+    def test_scipy_undirected_must_be_symmetric(self):
+        upper = sparse.csr_matrix(np.triu(np.ones((3, 3)), 1))
+        self.assertRaises(ValueError, CompiledGraph.from_scipy, upper,
+                          directed=False)
+        self.assertEqual(CompiledGraph.from_scipy(upper).number_of_edges(),
+                         3)
+        symmetric = upper + upper.T
+        compiled = CompiledGraph.from_scipy(symmetric, directed=False)
+        self.assertEqual(compiled.number_of_edges(), 3)
+        self.assertRaises(ValueError, CompiledGraph.from_scipy,
+                          sparse.csr_matrix(np.ones((2, 3))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from DiNetX.distance_store import DistanceStore
+from DiNetX.efficiency import global_efficiency, nodal_efficiency
+
+import baseline
+
+
+class DistanceStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        rng = random.Random(17)
+        self.graph = baseline.random_graph(rng, 30, 0.1, True, [1, 2, 3])
+
+    def test_results_match_search(self):
+        for weight in (True, False):
+            path = os.path.join(self.path, str(weight))
+            global_efficiency(self.graph, weight=weight, distances=path)
+            store = DistanceStore(path)
+            self.assertAlmostEqual(store.global_efficiency(),
+                                   baseline.global_efficiency(self.graph,
+                                                              weight),
+                                   places=12)
+            self.assertAlmostEqual(
+                global_efficiency(self.graph, weight=weight,
+                                  distances=store),
+                global_efficiency(self.graph, weight=weight), places=12)
+            expected = nodal_efficiency(self.graph, weight=weight)
+            result = nodal_efficiency(self.graph, weight=weight,
+                                      distances=store)
+            self.assertEqual(sorted(result), sorted(expected))
+            for node in expected:
+                self.assertAlmostEqual(result[node], expected[node],
+                                       places=12)
+
+    def test_rows(self):
+        store = DistanceStore.build(self.graph, self.path, weight=False,
+                                    block_rows=7)
+        self.assertEqual(store.matrix.dtype, np.uint8)
+        lengths = store.rows(0, store.order())
+        index = dict((node, i) for i, node in enumerate(store.nodes))
+        for source in self.graph:
+            row = lengths[index[source]]
+            reached = nx.single_source_shortest_path_length(
+                self.graph, source)
+            for node, i in index.items():
+                self.assertEqual(row[i], reached.get(node, np.inf))
+
+    def test_mismatch_errors(self):
+        store = DistanceStore.build(self.graph, self.path)
+        self.assertRaises(ValueError, global_efficiency, self.graph,
+                          weight=False, distances=store)
+        self.assertRaises(ValueError, global_efficiency, self.graph,
+                          to_undirected=True, distances=store)
+        changed = self.graph.copy()
+        u, v = next(iter(changed.edges()))
+        changed[u][v]['weight'] += 1
+        self.assertRaises(ValueError, nodal_efficiency, changed,
+                          distances=store)
+        changed = self.graph.copy()
+        changed.remove_edge(u, v)
+        self.assertRaises(ValueError, global_efficiency, changed,
+                          distances=store)
+
+    def test_bad_dtype(self):
+        graph = self.graph.copy()
+        u, v = next(iter(graph.edges()))
+        graph[u][v]['weight'] = 0.5
+        self.assertRaises(ValueError, DistanceStore.build, graph,
+                          self.path, dtype=np.uint16)
+        self.assertRaises(ValueError, DistanceStore.build, self.graph,
+                          self.path, dtype=np.bool_)
+        path = os.path.join(self.path, 'small')
+        path_graph = nx.path_graph(300, nx.DiGraph())
+        self.assertRaises(ValueError, DistanceStore.build, path_graph,
+                          path, weight=False, dtype=np.uint8)
+
+
+if __name__ == '__main__':
+    unittest.main()
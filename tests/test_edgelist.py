@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from DiNetX.edgelist import read_edgelist, stream_degree_centrality
+
+
+class ReadEdgelistTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, text):
+        path = os.path.join(self.directory, 'edges.txt')
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def edges(self, graph):
+        edges = {}
+        for i, node in enumerate(graph.nodes):
+            for e in range(graph.out_indptr[i], graph.out_indptr[i + 1]):
+                target = graph.nodes[graph.out_indices[e]]
+                edges[node, target] = graph.out_weights[e].item()
+        return edges
+
+    def test_random_file(self):
+        rng = random.Random(8)
+        lines = []
+        expected = {}
+        for _ in range(500):
+            u, v = rng.randrange(60), rng.randrange(60)
+            w = rng.randrange(1, 9)
+            lines.append('%d %d %d' % (u, v, w))
+            expected[str(u), str(v)] = w
+        # Small chunks make the loader join labels across chunks.
+        graph = read_edgelist(self.write('\n'.join(lines) + '\n'),
+                              chunk_bytes=97)
+        self.assertEqual(self.edges(graph), expected)
+        self.assertEqual(len(graph.nodes), len(set(graph.nodes)))
+
+    def test_mixed_columns(self):
+        # A chunk whose token count is a multiple of the first line's
+        # column count must not be reshaped as if all lines matched.
+        graph = read_edgelist(self.write('1 2 1\n3 4\n5 6 2 9\n'))
+        self.assertEqual(graph.nodes, ['1', '2', '3', '4', '5', '6'])
+        self.assertEqual(self.edges(graph),
+                         {('1', '2'): 1, ('3', '4'): 1, ('5', '6'): 2})
+
+    def test_comments_delimiter_and_nodetype(self):
+        path = self.write('# header\n1,2,0.5  # first\n2,3\n\n3,1,2.5\n')
+        graph = read_edgelist(path, delimiter=',', nodetype=int,
+                              directed=False)
+        self.assertEqual(graph.nodes, [1, 2, 3])
+        self.assertEqual(graph.number_of_edges(), 3)
+        self.assertEqual(self.edges(graph)[1, 2], 0.5)
+        self.assertEqual(self.edges(graph)[2, 3], 1)
+
+    def test_empty_file(self):
+        for text in ('', '# only a comment\n\n'):
+            path = self.write(text)
+            for directed in (True, False):
+                graph = read_edgelist(path, directed=directed)
+                self.assertEqual(graph.nodes, [])
+                self.assertEqual(graph.number_of_edges(), 0)
+            self.assertEqual(stream_degree_centrality(path)['degree'], {})
+
+    def test_short_line(self):
+        self.assertRaises(ValueError, read_edgelist, self.write('1 2\n3\n'))
+
+    def test_stream_degree_centrality(self):
+        path = self.write('a b 2\nb c 4\na c\n')
+        centrality = stream_degree_centrality(path, alpha=0.5)
+        self.assertAlmostEqual(centrality['degree']['a'], 2 * 1.5 ** 0.5)
+        self.assertAlmostEqual(centrality['out_degree']['b'], 2)
+        self.assertAlmostEqual(centrality['in_degree']['a'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import random
+import unittest
+
+import networkx as nx
+
+from DiNetX.h_degree import (HDegreeTracker, h_degree, in_h_degree,
+                             out_h_degree)
+
+import baseline
+
+
+class HDegreeTrackerTest(unittest.TestCase):
+
+    def check(self, tracker, graph):
+        self.assertEqual(tracker.h_degree(), h_degree(graph))
+        self.assertEqual(tracker.h_degree(), baseline.h_degree(graph))
+        if graph.is_directed():
+            self.assertEqual(tracker.in_h_degree(), in_h_degree(graph))
+            self.assertEqual(tracker.out_h_degree(), out_h_degree(graph))
+
+    def test_random_events_match_fresh_calls(self):
+        rng = random.Random(10)
+        for directed in (True, False):
+            graph = baseline.random_graph(rng, 15, 0.2, directed,
+                                          [1, 2, 3, 4, 6, 2.5])
+            tracker = HDegreeTracker(graph)
+            self.check(tracker, graph)
+
+            for _ in range(200):
+                edges = list(graph.edges())
+                if rng.random() < 0.4 and edges:
+                    u, v = rng.choice(edges)
+                    graph.remove_edge(u, v)
+                    tracker.remove_edge(u, v)
+                else:
+                    u, v = rng.choice(list(graph.nodes())), rng.randrange(18)
+                    w = rng.choice([1, 2, 3, 5, 8, 0.5, 4.5])
+                    graph.add_edge(u, v, weight=w)
+                    tracker.add_edge(u, v, w)
+                self.check(tracker, graph)
+                node = rng.choice(list(graph.nodes()))
+                self.assertEqual(tracker.h_degree(node),
+                                 h_degree(graph)[node])
+
+    def test_empty_tracker(self):
+        tracker = HDegreeTracker(directed=False)
+        tracker.add_node('a')
+        tracker.add_edge('a', 'b', 3)
+        tracker.add_edge('b', 'c', 4)
+        self.assertEqual(tracker.h_degree(), {'a': 1, 'b': 2, 'c': 1})
+        tracker.add_edge('a', 'b', 1)
+        self.assertEqual(tracker.h_degree('b'), 1)
+        self.assertRaises(nx.NetworkXError, tracker.remove_edge, 'a', 'c')
+        self.assertRaises(nx.NetworkXError, tracker.in_h_degree)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import itertools
+import os
+import shutil
+import tempfile
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from DiNetX.accessibility import (accessibility, in_accessibility,
+                                  iter_accessibility, iter_in_accessibility,
+                                  iter_out_accessibility)
+from DiNetX.compiled import CompiledGraph
+from DiNetX.degree_centrality import (degree_centrality,
+                                      in_degree_centrality,
+                                      iter_degree_centrality,
+                                      iter_in_degree_centrality,
+                                      iter_out_degree_centrality,
+                                      out_degree_centrality)
+from DiNetX.h_degree import (h_degree, in_h_degree, iter_h_degree,
+                             iter_in_h_degree, iter_out_h_degree,
+                             out_h_degree)
+
+
+def random_graph(seed, n, m, directed=True):
+    rng = np.random.RandomState(seed)
+    return CompiledGraph.from_edges(rng.randint(0, n, m), rng.randint(0, n, m),
+                                    rng.randint(1, 6, m), nodes=range(n),
+                                    directed=directed)
+
+
+class IterTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # More rows than one block of the degree based generators.
+        cls.large = random_graph(24, 70000, 140000)
+        cls.small = random_graph(25, 1100, 4000)
+
+    def assertRecords(self, records, expected, nodes):
+        records = list(records)
+        self.assertEqual([node for node, _ in records], list(nodes))
+        for node, value in records:
+            self.assertAlmostEqual(value, expected[node], places=12)
+
+    def test_degree_generators_match_dicts(self):
+        graph = self.large
+        self.assertRecords(iter_h_degree(graph), h_degree(graph),
+                           graph.nodes)
+        self.assertRecords(iter_in_h_degree(graph), in_h_degree(graph),
+                           graph.nodes)
+        self.assertRecords(iter_out_h_degree(graph), out_h_degree(graph),
+                           graph.nodes)
+        for alpha in (0, 0.5, 1):
+            self.assertRecords(iter_degree_centrality(graph, alpha),
+                               degree_centrality(graph, alpha), graph.nodes)
+            self.assertRecords(iter_in_degree_centrality(graph, alpha),
+                               in_degree_centrality(graph, alpha),
+                               graph.nodes)
+            self.assertRecords(iter_out_degree_centrality(graph, alpha),
+                               out_degree_centrality(graph, alpha),
+                               graph.nodes)
+
+    def test_accessibility_generators_match_arrays(self):
+        graph = self.small
+        nodes = list(range(graph.order() - 1, 0, -2))
+        cases = [(iter_accessibility, accessibility),
+                 (iter_out_accessibility, accessibility),
+                 (iter_in_accessibility, in_accessibility)]
+        for generate, compute in cases:
+            for selected in (None, nodes):
+                values, expected_nodes = compute(graph, h=3, nodes=selected,
+                                                 output='array')
+                records = list(generate(graph, h=3, nodes=selected))
+                self.assertEqual([node for node, _ in records],
+                                 list(expected_nodes))
+                np.testing.assert_allclose(
+                    np.array([row for _, row in records]), values,
+                    rtol=1e-12)
+
+    def test_chunks(self):
+        graph = self.small
+        records = list(iter_h_degree(graph))
+        for chunk_size in (1, 7, graph.order(), graph.order() + 1):
+            chunks = list(iter_h_degree(graph, chunk_size=chunk_size))
+            self.assertTrue(all(len(chunk) == chunk_size
+                                for chunk in chunks[:-1]))
+            self.assertTrue(0 < len(chunks[-1]) <= chunk_size)
+            self.assertEqual(list(itertools.chain(*chunks)), records)
+
+        chunks = list(iter_accessibility(graph, h=2, chunk_size=300))
+        self.assertEqual([len(chunk) for chunk in chunks],
+                         [300, 300, 300, 200])
+
+    def test_bad_arguments(self):
+        graph = self.small
+        for generate in (iter_h_degree, iter_degree_centrality,
+                         iter_accessibility):
+            self.assertRaises(ValueError, generate, graph, chunk_size=0)
+        self.assertRaises(ValueError, iter_degree_centrality, graph, -1)
+        undirected = nx.Graph([(0, 1)])
+        for generate in (iter_in_h_degree, iter_out_h_degree,
+                         iter_in_accessibility, iter_out_accessibility):
+            self.assertRaises(nx.NetworkXError, generate, undirected)
+
+    def test_memory_mapped_output_matches_generator(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        filename = os.path.join(path, 'values.npy')
+        graph = self.small
+        values, nodes = accessibility(graph, h=3, out=filename)
+        self.assertIsInstance(values, np.memmap)
+        stored = np.load(filename)
+        self.assertEqual(stored.shape, (graph.order(), 3))
+        np.testing.assert_array_equal(
+            stored, np.array([row for _, row in iter_accessibility(graph)]))
+
+
+if __name__ == '__main__':
+    unittest.main()
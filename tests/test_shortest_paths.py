@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import unittest
+
+import numpy as np
+
+from DiNetX.compiled import CompiledGraph
+from DiNetX.shortest_paths import (bfs_inverse_sums, dijkstra_inverse_sums,
+                                   select_engine)
+
+
+def random_graph(seed, n, m, low, high, directed=True):
+    rng = np.random.RandomState(seed)
+    return CompiledGraph.from_edges(rng.randint(0, n, m), rng.randint(0, n, m),
+                                    rng.randint(low, high + 1, m),
+                                    nodes=range(n), directed=directed)
+
+
+class SelectEngineTest(unittest.TestCase):
+
+    def test_auto(self):
+        # Small integer weights at average degree 4.
+        self.assertEqual(select_engine(random_graph(0, 2000, 8000, 1, 10)),
+                         'dial')
+        self.assertEqual(select_engine(random_graph(1, 2000, 8000, 1, 1000)),
+                         'dial')
+        # Weights far above the number of edges a search relaxes.
+        self.assertEqual(select_engine(random_graph(2, 300, 9000, 1, 60000)),
+                         'heap')
+        # A long path makes every search step through many distances.
+        path = CompiledGraph.from_edges(np.arange(1499), np.arange(1, 1500),
+                                        np.full(1499, 100), directed=False)
+        self.assertEqual(select_engine(path), 'heap')
+
+        graph = random_graph(3, 100, 400, 1, 3)
+        floats = CompiledGraph(graph.nodes, graph.out_indptr,
+                               graph.out_indices,
+                               graph.out_weights.astype(float))
+        self.assertEqual(select_engine(floats), 'heap')
+        self.assertEqual(select_engine(CompiledGraph.from_edges([], [])),
+                         'dial')
+
+    def test_explicit(self):
+        graph = random_graph(4, 100, 400, 1, 3)
+        self.assertEqual(select_engine(graph, 'heap'), 'heap')
+        floats = CompiledGraph(graph.nodes, graph.out_indptr,
+                               graph.out_indices,
+                               graph.out_weights.astype(float))
+        self.assertRaises(ValueError, select_engine, floats, 'dial')
+        self.assertRaises(ValueError, select_engine, graph, 'fibonacci')
+
+    def test_engines_agree(self):
+        for seed, (low, high) in enumerate([(1, 5), (0, 3), (1, 5000)]):
+            graph = random_graph(seed, 200, 800, low, high, seed % 2 == 0)
+            sources = range(graph.order())
+            dial = list(dijkstra_inverse_sums(graph, sources, 'dial'))
+            heap = list(dijkstra_inverse_sums(graph, sources, 'heap'))
+            self.assertEqual(dial, heap)
+
+    def test_bfs_matches_unit_weights(self):
+        for directed in (True, False):
+            graph = random_graph(5, 700, 1400, 1, 1, directed)
+            sources = range(graph.order())
+            # Sums are taken level by level, in another order.
+            for bfs, heap in zip(bfs_inverse_sums(graph, sources, words=1),
+                                 dijkstra_inverse_sums(graph, sources,
+                                                       'heap')):
+                self.assertAlmostEqual(bfs, heap, places=10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from DiNetX.cache import fingerprint
+from DiNetX.compiled import as_compiled
+from DiNetX.efficiency import global_efficiency
+from DiNetX.snapshot import read_snapshot, write_snapshot
+
+import baseline
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def assertSameGraph(self, loaded, graph):
+        compiled = as_compiled(graph)
+        self.assertEqual(loaded.nodes, compiled.nodes)
+        self.assertEqual(loaded.is_directed(), compiled.is_directed())
+        for name in ('out_indptr', 'out_indices', 'out_weights',
+                     'in_indptr', 'in_indices', 'in_weights'):
+            np.testing.assert_array_equal(getattr(loaded, name),
+                                          getattr(compiled, name))
+        self.assertEqual(fingerprint(loaded), fingerprint(compiled))
+
+    def test_round_trip(self):
+        rng = random.Random(23)
+        for directed in (True, False):
+            for weights in ([1, 2, 3], [0.5, 1.25]):
+                graph = baseline.random_graph(rng, 25, 0.15, directed,
+                                              weights)
+                for mmap in (True, False):
+                    path = os.path.join(self.path, '%s%s%s' % (
+                        directed, weights[0], mmap))
+                    write_snapshot(graph, path)
+                    loaded = read_snapshot(path, mmap=mmap)
+                    self.assertSameGraph(loaded, graph)
+                    self.assertEqual(isinstance(loaded.out_indices,
+                                                np.memmap), mmap)
+
+    def test_labels(self):
+        labelled = [['a', 'b', 'c'], [10, -3, 7], [(0, 1), 'b', 2.5]]
+        for i, nodes in enumerate(labelled):
+            graph = nx.DiGraph()
+            graph.add_nodes_from(nodes)
+            graph.add_edge(nodes[0], nodes[1], weight=2)
+            graph.add_edge(nodes[2], nodes[0], weight=1)
+            path = os.path.join(self.path, str(i))
+            write_snapshot(graph, path)
+            self.assertSameGraph(read_snapshot(path), graph)
+
+    def test_mapped_arrays_are_read_only(self):
+        graph = nx.DiGraph([(0, 1), (1, 2)])
+        write_snapshot(graph, self.path)
+        loaded = read_snapshot(self.path)
+        with self.assertRaises(ValueError):
+            loaded.out_indices[0] = 2
+
+    def test_metrics_and_workers(self):
+        rng = random.Random(24)
+        graph = baseline.random_graph(rng, 40, 0.1, True, [1, 2, 3])
+        write_snapshot(graph, self.path)
+        loaded = read_snapshot(self.path)
+        expected = baseline.global_efficiency(graph, True)
+        self.assertAlmostEqual(global_efficiency(loaded), expected,
+                               places=12)
+        self.assertAlmostEqual(global_efficiency(loaded, n_jobs=2),
+                               expected, places=12)
+
+    def test_version_error(self):
+        write_snapshot(nx.DiGraph([(0, 1)]), self.path)
+        meta = os.path.join(self.path, 'meta.json')
+        with open(meta) as f:
+            content = json.load(f)
+        content['version'] = 0
+        with open(meta, 'w') as f:
+            json.dump(content, f)
+        self.assertRaises(ValueError, read_snapshot, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import random
+import unittest
+
+from DiNetX.efficiency import EfficiencyTracker, global_efficiency
+
+import baseline
+
+
+class EfficiencyTrackerTest(unittest.TestCase):
+
+    def check(self, tracker, graph, weight):
+        self.assertEqual(tracker.global_efficiency(),
+                         global_efficiency(graph, weight))
+        self.assertAlmostEqual(tracker.global_efficiency(),
+                               baseline.global_efficiency(graph, weight),
+                               places=12)
+        nodal = tracker.nodal_efficiency()
+        self.assertEqual(list(nodal), list(graph.nodes()))
+        self.assertAlmostEqual(sum(nodal.values()) / graph.order(),
+                               tracker.global_efficiency(), places=12)
+
+    def test_random_events_match_fresh_calls(self):
+        rng = random.Random(2)
+        for trial in range(8):
+            directed = trial % 2 == 0
+            weight = trial % 4 < 2
+            graph = baseline.random_graph(rng, 12, 0.2, directed,
+                                          [1, 2, 3, 5])
+            tracker = EfficiencyTracker(graph, weight=weight)
+            self.check(tracker, graph, weight)
+
+            for _ in range(40):
+                event = rng.random()
+                edges = list(graph.edges())
+                if event < 0.3 and edges:
+                    u, v = rng.choice(edges)
+                    graph.remove_edge(u, v)
+                    tracker.remove_edge(u, v)
+                elif event < 0.5 and edges:
+                    # Reweight, up or down.
+                    u, v = rng.choice(edges)
+                    w = rng.choice([1, 2, 3, 5, 8])
+                    graph.add_edge(u, v, weight=w)
+                    tracker.add_edge(u, v, w)
+                elif event < 0.55:
+                    node = graph.order()
+                    graph.add_node(node)
+                    tracker.add_node(node)
+                else:
+                    u, v = rng.sample(list(graph.nodes()), 2)
+                    w = rng.choice([1, 2, 3, 5])
+                    graph.add_edge(u, v, weight=w)
+                    tracker.add_edge(u, v, w)
+                self.check(tracker, graph, weight)
+
+
+if __name__ == '__main__':
+    unittest.main()
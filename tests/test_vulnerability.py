@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Tanja Miličić"
+
+import random
+import unittest
+
+from DiNetX.efficiency import vulnerability
+
+import baseline
+
+
+class VulnerabilityTest(unittest.TestCase):
+
+    def test_matches_removing_each_node(self):
+        rng = random.Random(3)
+        cases = [(True, [1, 2, 3]), (False, [1, 2, 3]), (True, [0, 1, 2]),
+                 (False, [0.5, 1.5, 2.25]), (True, [1])]
+        for directed, weights in cases:
+            graph = baseline.random_graph(rng, 20, 0.15, directed, weights)
+            for weight in (True, False):
+                efficiency = baseline.global_efficiency(graph, weight)
+                result = vulnerability(graph, weight=weight)
+                for node in graph:
+                    reduced = graph.copy()
+                    reduced.remove_node(node)
+                    expected = (efficiency - baseline.global_efficiency(
+                        reduced, weight)) / efficiency
+                    self.assertAlmostEqual(result[node], expected, places=10)
+
+    def test_selected_nodes(self):
+        rng = random.Random(4)
+        graph = baseline.random_graph(rng, 30, 0.1, True, [1, 2, 4])
+        nodes = rng.sample(list(graph.nodes()), 5)
+        full = vulnerability(graph)
+        selected = vulnerability(graph, nodes=nodes)
+        self.assertEqual(sorted(selected), sorted(nodes))
+        for node in nodes:
+            self.assertAlmostEqual(selected[node], full[node], places=12)
+
+
+if __name__ == '__main__':
+    unittest.main()